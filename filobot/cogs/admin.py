@@ -8,7 +8,7 @@ import peewee
 from discord import Guild
 from discord.ext import commands
 
-from filobot.models import Player, Blacklist
+from filobot.models import db_executor, Player, Blacklist
 
 
 class Admin(commands.Cog):
@@ -40,13 +40,16 @@ class Admin(commands.Cog):
                 await guild.owner.send(f"This is a notice that a member of your Discord Guild **{guild.name}** has been added to Filo's blacklist. The member in question is **{member.name}#{member.discriminator}** with the Discord ID **{member.id}**. For more information, please contact support at https://discord.gg/UmAhGVT")
                 self._log.info(f"Ban notice sent to {guild.owner.name}#{guild.owner.discriminator}")
 
-        try:
-            player = Player.get(Player.discord_id == id)
-            player.status = Player.STATUS_BANNED
-            player.save()
-        except peewee.DoesNotExist:
-            player = Player.create(lodestone_id=0, discord_id=id, name="Banned player",
-                                   world="None", validation_code=uuid.uuid4())
+        def _ban():
+            try:
+                player = Player.get(Player.discord_id == id)
+                player.status = Player.STATUS_BANNED
+                player.save()
+            except peewee.DoesNotExist:
+                Player.create(lodestone_id=0, discord_id=id, name="Banned player",
+                              world="None", validation_code=uuid.uuid4())
+
+        await db_executor.write(_ban)
 
         await ctx.send(f"Discord member `{id}` banned from accessing Filo")
 
@@ -56,11 +59,11 @@ class Admin(commands.Cog):
         """
         Bans a Guild from using Filo
         """
-        try:
-            bl = Blacklist.get(Blacklist.guild_id == guild_id)
+        bl = await db_executor.read(Blacklist.get_or_none, Blacklist.guild_id == guild_id)
+        if bl:
             await ctx.send(f"Guild `{bl.guild_id}`` is already blacklisted")
-        except peewee.DoesNotExist:
-            bl = Blacklist.create(guild_id=guild_id)
+        else:
+            await db_executor.write(Blacklist.create, guild_id=guild_id)
 
         for guild in self.bot.guilds:  # type: Guild
             if guild.id == guild_id:
@@ -76,11 +79,9 @@ class Admin(commands.Cog):
         """
         Unbans a Guild from using Filo
         """
-        try:
-            bl = Blacklist.get(Blacklist.guild_id == guild_id)
-            Blacklist.delete_by_id(guild_id)
+        if await db_executor.write(Blacklist.delete_by_id, guild_id):
             await ctx.send(f"Guild `{guild_id}` removed from the blacklist")
-        except peewee.DoesNotExist:
+        else:
             await ctx.send(f"Guild `{guild_id}` is not blacklisted")
 
     @commands.command(hidden=True)
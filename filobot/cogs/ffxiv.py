@@ -7,7 +7,7 @@ import discord
 import peewee
 from discord.ext import commands
 
-from filobot.models import GuildSettings, Player
+from filobot.models import db_executor, GuildSettings, Player
 from filobot.utilities.manager import HuntManager
 from filobot.utilities.xivapi import XivApi
 
@@ -25,7 +25,7 @@ class FFXIV(commands.Cog):
         """
         Link your FFXIV character to Filo
         """
-        if Player.select().where(Player.discord_id == ctx.author.id).count():
+        if await db_executor.read(lambda: Player.select().where(Player.discord_id == ctx.author.id).count()):
             confirm_message = await ctx.send(f"{ctx.author.mention} An FFXIV character has already been linked to this Discord account. Are you sure you want to replace it? (Y/N)")
             try:
                 response = await self.bot.wait_for('message', timeout=15.0, check=self._author_check(ctx.message.author))
@@ -51,7 +51,7 @@ class FFXIV(commands.Cog):
 
         async with ctx.typing():
             try:
-                Player.delete().where(Player.discord_id == ctx.author.id).execute()
+                await db_executor.write(lambda: Player.delete().where(Player.discord_id == ctx.author.id).execute())
                 lodestone_id, character = await self.xiv.search_character(world, forename, surname)
             except ValueError as e:
                 await ctx.send(str(e))
@@ -64,11 +64,14 @@ class FFXIV(commands.Cog):
                     await ctx.send(f"Unable to find a character by the name of **{character}** on the world **{world.lower().title()}** - Please check your spelling and try again.")
                     return
 
-            try:
+            def _link():
                 Player.delete().where(
                     (Player.lodestone_id == lodestone_id) & (Player.status == Player.STATUS_PENDING)).execute()
-                player = Player.create(lodestone_id=lodestone_id, discord_id=ctx.author.id, name=character.name,
-                                       world=character.server, validation_code=uuid.uuid4())
+                return Player.create(lodestone_id=lodestone_id, discord_id=ctx.author.id, name=character.name,
+                                     world=character.server, validation_code=uuid.uuid4())
+
+            try:
+                player = await db_executor.write(_link)
             except peewee.IntegrityError:
                 await ctx.send(f"{ctx.author.mention} This character has already been linked to another discord user.")
                 return
@@ -83,7 +86,7 @@ class FFXIV(commands.Cog):
         Verify an account linked with the f.iam command
         """
         try:
-            player = Player.get(Player.discord_id == ctx.author.id)
+            player = await db_executor.read(Player.get, Player.discord_id == ctx.author.id)
         except peewee.DoesNotExist:
             await ctx.send(f"{ctx.author.mention} You haven't linked your FFXIV account yet! Run the `f.help iam` command for information on how to do this.")
             return
@@ -108,7 +111,7 @@ class FFXIV(commands.Cog):
                 await ctx.author.add_roles(verified_role)
 
             player.status = Player.STATUS_VERIFIED
-            player.save()
+            await db_executor.write(player.save)
             verified_message = str(await GuildSettings.fetch('verified_message', ctx)).replace('{mention}', ctx.author.mention)
             await ctx.send(verified_message)
         else:
@@ -121,7 +124,7 @@ class FFXIV(commands.Cog):
         Get information on your linked FFXIV character
         """
         try:
-            player = Player.get(Player.discord_id == ctx.author.id)
+            player = await db_executor.read(Player.get, Player.discord_id == ctx.author.id)
         except peewee.DoesNotExist:
             await ctx.send(f"{ctx.author.mention} You haven't linked your FFXIV account yet! Run the `f.help iam` command for information on how to do this.")
             return
@@ -142,7 +145,7 @@ class FFXIV(commands.Cog):
         Get the specified discord users FFXIV account
         """
         try:
-            player = Player.get(Player.discord_id == member.id)
+            player = await db_executor.read(Player.get, Player.discord_id == member.id)
         except peewee.DoesNotExist:
             await ctx.send(f"{member.display_name} has not linked their FFXIV account to their Discord profile")
             return
@@ -1,7 +1,4 @@
-import json
 import logging
-import os
-import sys
 import typing
 
 import discord
@@ -21,9 +18,6 @@ class Hunts(commands.Cog):
 
         self.hunt_manager = hunt_manager
 
-        with open(os.path.dirname(os.path.realpath(sys.argv[0])) + os.sep + os.path.join('data', 'marks_info.json')) as json_file:
-            self.marks_info = json.load(json_file)
-
         self._trains = {}
         self.hunt_manager.add_recheck_cb(self._update_train)
 
@@ -119,6 +113,7 @@ class Hunts(commands.Cog):
         Allowed datacenters: Aether, Primal, Crystal, Chaos, Light
         Allowed categories: SHB_A, SHB_S, SB_A, SB_S, HW_A, HW_S, ARR_A, ARR_S
         Allowed conditions: FINDS, DEATHS, OPENINGS
+        Multiple datacenters or categories may be separated by commas, e.g. Aether,Primal SB_A,SB_S
         """
         await self.hunt_manager.subscribe_all(datacenter, ctx.channel.id, category, conditions)
 
@@ -126,8 +121,9 @@ class Hunts(commands.Cog):
     @commands.has_permissions(administrator=True)
     async def unsub(self, ctx: commands.context.Context, world: str, category: str):
         """
-        Subscribe the channel to hunt events
+        Unsubscribe the channel from hunt events
         Allowed categories: SHB_A, SHB_S, SB_A, SB_S, HW_A, HW_S, ARR_A, ARR_S
+        Multiple worlds, datacenters or categories may be separated by commas
         """
         await self.hunt_manager.unsubscribe(ctx.channel.id, world, category)
 
@@ -149,7 +145,8 @@ class Hunts(commands.Cog):
         counter = 0
         i = 0
         for sub in subs:
-            message = message + f"""\n* {sub.world} — {str(sub.category).upper().replace('_', ' ')} — {sub.event}"""
+            world = f"{sub.world} (all worlds)" if sub.datacenter else sub.world
+            message = message + f"""\n* {world} — {str(sub.category).upper().replace('_', ' ')} — {', '.join(sub.events())}"""
             i += 1
             counter += 1
             if i > 39:
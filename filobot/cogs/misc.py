@@ -5,7 +5,7 @@ import discord
 import git
 from discord.ext import commands
 
-from filobot.models import Player, ScoutingSessions
+from filobot.models import db_executor, Player, ScoutingSessions
 from filobot.utilities.manager import HuntManager
 
 
@@ -47,8 +47,8 @@ class Misc(commands.Cog):
         Get some miscellaneous bot statistics
         """
         a_count, s_count = await self._hunt_manager.count()
-        train_count = ScoutingSessions.select().where(ScoutingSessions.status == ScoutingSessions.STATUS_COMPLETED).count()
-        player_count = Player.select().where(Player.status == Player.STATUS_VERIFIED).count()
+        train_count = await db_executor.read(lambda: ScoutingSessions.select().where(ScoutingSessions.status == ScoutingSessions.STATUS_COMPLETED).count())
+        player_count = await db_executor.read(lambda: Player.select().where(Player.status == Player.STATUS_VERIFIED).count())
 
         # Git build hash
         repo = git.Repo(search_parent_directories=True)
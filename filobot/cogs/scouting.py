@@ -12,7 +12,7 @@ import pystache
 from discord.ext import commands
 from peewee import fn, SQL
 
-from filobot.models import ScoutingHunts, ScoutingSessions
+from filobot.models import db_executor, ScoutingHunts, ScoutingSessions
 from filobot.utilities import parse_sb_hunt_name
 from filobot.utilities.manager import HuntManager
 
@@ -90,7 +90,8 @@ class Scouting(commands.Cog):
             await ctx.send("A scouting session has already been started - run **f.cancel** first to start a new session")
             return
 
-        self._session = ScoutingSessions.create(
+        self._session = await db_executor.write(
+            ScoutingSessions.create,
             channel_id=ctx.channel.id,
             started_by=ctx.author.id,
             status=ScoutingSessions.STATUS_STARTED,
@@ -157,7 +158,8 @@ class Scouting(commands.Cog):
             await confirm_message.delete()
             return
 
-        ScoutingHunts.create(
+        await db_executor.write(
+            ScoutingHunts.create,
             scouting_session=self._session,
             hunt=hunt,
             scouted_by=scout,
@@ -242,7 +244,7 @@ class Scouting(commands.Cog):
 
         self._session.status = ScoutingSessions.STATUS_COMPLETED
         self._session.scouts = ','.join(scouts)
-        self._session.save()
+        await db_executor.write(self._session.save)
 
         scouts = "\n* ".join(scouts)
         scouts = f"""\n```markdown\nScouts: \n* {scouts}```""" if scouts else ''
@@ -268,7 +270,7 @@ class Scouting(commands.Cog):
             self._log.warning("Scouting session cancelled, but the scouting message was already deleted")
 
         self._session.status = ScoutingSessions.STATUS_CANCELLED
-        self._session.save()
+        await db_executor.write(self._session.save)
         self._reset()
 
         # Log the action
@@ -362,6 +364,7 @@ class Scouting(commands.Cog):
             .where((ScoutingSessions.status != ScoutingSessions.STATUS_CANCELLED) & (ScoutingSessions.date >= cutoff))\
             .group_by(ScoutingHunts.discord_user)\
             .order_by(SQL('score').desc())
+        query = await db_executor.read(list, query)
 
         message = f"""```markdown\nScoreboard ({days} days)\n"""
         message = message + "=" * len(f"""Scoreboard ({days} days)""") + "\n"
@@ -4,7 +4,7 @@ import typing
 import discord
 from discord.ext import commands
 
-from filobot.models import GuildSettings as GuildSettings, Player
+from filobot.models import db_executor, GuildSettings as GuildSettings, Player
 
 
 class Settings(commands.Cog):
@@ -82,7 +82,7 @@ class Settings(commands.Cog):
         if verified_role:
             async with ctx.typing():
                 await status.edit(content="Synchronizing verified member roles..")
-                verified_members = list(Player.select().where(Player.status == Player.STATUS_VERIFIED).execute())
+                verified_members = await db_executor.read(lambda: list(Player.select().where(Player.status == Player.STATUS_VERIFIED)))
                 for member in verified_members:
                     self._log.info(f"Synchronizing member {member.name} ({member.discord_id})")
                     member = ctx.guild.get_member(int(member.discord_id))
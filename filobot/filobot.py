@@ -11,8 +11,9 @@ from filobot.cogs.admin import Admin
 from filobot.cogs.ffxiv import FFXIV
 from filobot.cogs.misc import Misc
 from filobot.cogs.settings import Settings
-from filobot.models import db, GuildSettings, KillLog, Player, ScoutingHunts, ScoutingSessions, Subscriptions, \
-    SubscriptionsMeta, Blacklist
+from filobot.models import db, db_executor, GuildSettings, KillLog, Player, ScoutingHunts, ScoutingSessions, Subscriptions, \
+    SubscriptionsMeta, Blacklist, Outbox, Notifications, RelayCounters
+from filobot.models.migrations import migrate
 from filobot.utilities.manager import HuntManager
 
 # Load our configuration
@@ -32,10 +33,26 @@ ch.setFormatter(logFormat)
 
 log.addHandler(ch)
 
-db.create_tables([Subscriptions, SubscriptionsMeta, ScoutingSessions, ScoutingHunts, Player, GuildSettings, KillLog, Blacklist])
+migrate(db, [Subscriptions, SubscriptionsMeta, ScoutingSessions, ScoutingHunts, Player, GuildSettings, KillLog, Blacklist, Outbox,
+             Notifications, RelayCounters])
 
-bot = commands.Bot(command_prefix='g.')
-hunt_manager = HuntManager(bot)
+
+class Filobot(commands.Bot):
+
+    async def close(self):
+        # noinspection PyBroadException
+        try:
+            await hunt_manager.close()
+        except Exception:
+            log.exception('Exception thrown while shutting down the hunt manager')
+        await super().close()
+
+        # Last, once the outbox and relay counters have had their final writes
+        db_executor.shutdown()
+
+
+bot = Filobot(command_prefix='g.')
+hunt_manager = HuntManager(bot, config.getint('Hunts', 'DedupeWindow', fallback=3600))
 bot.add_cog(Hunts(bot, hunt_manager))
 # bot.add_cog(Scouting(bot, hunt_manager))
 bot.add_cog(FFXIV(bot, config.get('Bot', 'XivApiKey')))
@@ -61,7 +78,7 @@ async def on_ready():
 
 @bot.event
 async def on_guild_join(guild: discord.Guild):
-    if Blacklist.select().where(Blacklist.guild_id == guild.id).count():
+    if await db_executor.read(lambda: Blacklist.select().where(Blacklist.guild_id == guild.id).count()):
         await guild.owner.send(f"The server **{guild.name}** bas been blacklisted from accessing Filo. For more information, please contact Totomo Omo on Mateus")
         await guild.leave()
 
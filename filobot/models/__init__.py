@@ -2,17 +2,29 @@ import os
 import sys
 import logging
 import datetime
+import typing
 
 from discord.ext import commands
 from peewee import *
 
+from .executor import DatabaseExecutor
+
 
 logger = logging.getLogger('peewee')
 logger.addHandler(logging.StreamHandler())
 logger.setLevel(logging.WARNING)
 
 db_path = os.path.dirname(os.path.realpath(sys.argv[0])) + os.sep + os.path.join('data', 'filobot.db')
-db = SqliteDatabase(db_path, pragmas={'foreign_keys': 1})
+db = SqliteDatabase(db_path, pragmas={
+    'journal_mode': 'wal',        # Readers don't block on the writer (and vice versa)
+    'synchronous': 1,             # NORMAL, safe with WAL
+    'cache_size': -16000,         # 16MB page cache
+    'mmap_size': 64 * 1024 * 1024,
+    'foreign_keys': 1,
+})
+
+# All model access from the event loop goes through the executor
+db_executor = DatabaseExecutor(db)
 
 
 class BaseModel(Model):
@@ -21,17 +33,57 @@ class BaseModel(Model):
 
 
 class Subscriptions(BaseModel):
-    channel_id = IntegerField(index=True)
-    world = CharField(index=True)
-    category = CharField(index=True)
-    event = CharField()
+
+    # Condition bits
+    COND_FIND = 1
+    COND_DEAD = 2
+    COND_OPEN = 4
+    CONDITIONS = {'finds': COND_FIND, 'deaths': COND_DEAD, 'openings': COND_OPEN}
+
+    channel_id = IntegerField()
+    world = CharField()                         # World name, or datacenter name for datacenter-wide subscriptions
+    datacenter = BooleanField(default=False)
+    category = CharField()
+    conditions = IntegerField(default=0)        # Bitmask of CONDITIONS
+
+    class Meta:
+        indexes = (
+            (('channel_id', 'world', 'category'), True),
+            (('world', 'category'), False),
+        )
+
+    @staticmethod
+    def mask(conditions: typing.Iterable[str]) -> int:
+        mask = 0
+        for condition in conditions:
+            mask |= Subscriptions.CONDITIONS[condition]
+        return mask
+
+    def events(self) -> typing.List[str]:
+        return [name for name, bit in Subscriptions.CONDITIONS.items() if self.conditions & bit]
 
 
 class SubscriptionsMeta(BaseModel):
-    channel_id = IntegerField(index=True)
+    channel_id = IntegerField()
     name = CharField()
     value = CharField()
 
+    class Meta:
+        indexes = (
+            (('channel_id', 'name'), False),
+        )
+
+
+class RelayCounters(BaseModel):
+    channel_id  = IntegerField()
+    rank        = CharField(max_length=1)
+    count       = IntegerField(default=0)
+
+    class Meta:
+        indexes = (
+            (('channel_id', 'rank'), True),
+        )
+
 
 class ScoutingSessions(BaseModel):
 
@@ -56,11 +108,64 @@ class ScoutingHunts(BaseModel):
 
 class KillLog(BaseModel):
     hunt_name   = CharField(index=True)
-    world       = CharField(max_length=50, index=True)
+    world       = CharField(max_length=50)
     found       = IntegerField()
     killed      = IntegerField(null=True)
     kill_time   = IntegerField(null=True)
 
+    class Meta:
+        indexes = (
+            (('world', 'hunt_name', 'found'), False),
+        )
+
+
+class Notifications(BaseModel):
+    channel_id  = IntegerField()
+    world       = CharField(max_length=50)
+    hunt_name   = CharField()
+    instance    = IntegerField(default=1)
+    message_id  = IntegerField()
+    content     = CharField(max_length=2000)
+    kill_log    = ForeignKeyField(KillLog, on_delete='CASCADE')
+    created     = IntegerField(index=True)
+
+    class Meta:
+        indexes = (
+            (('channel_id', 'world', 'hunt_name', 'instance'), True),
+        )
+
+
+class Outbox(BaseModel):
+
+    STATUS_PENDING   = 0
+    STATUS_DELIVERED = 1
+    STATUS_FAILED    = -1
+
+    KIND_FIND  = 'find'
+    KIND_OPEN  = 'open'
+    KIND_DEATH = 'death'  # Edits the found notification in message_id rather than sending a new message
+
+    event        = CharField(index=True)  # Identifies the hunt event, shared by every channel it's sent to
+    channel_id   = IntegerField()
+    kind         = CharField(max_length=16)
+    world        = CharField(max_length=50)
+    hunt_name    = CharField()
+    instance     = IntegerField(default=1)
+    rank         = CharField(max_length=1)
+    content      = CharField(max_length=2000)
+    embed        = TextField()
+    status       = IntegerField(default=STATUS_PENDING, index=True)
+    attempts     = IntegerField(default=0)
+    next_attempt = IntegerField(default=0)
+    message_id   = IntegerField(null=True)
+    created      = IntegerField()
+    delivered    = IntegerField(null=True)
+
+    class Meta:
+        indexes = (
+            (('event', 'channel_id'), True),
+        )
+
 
 class Player(BaseModel):
 
@@ -82,6 +187,12 @@ class Blacklist(BaseModel):
     ban_date    = DateTimeField(default=datetime.datetime.now)
 
 
+class SchemaVersion(BaseModel):
+    version     = IntegerField(primary_key=True)
+    name        = CharField()
+    applied     = DateTimeField(default=datetime.datetime.now)
+
+
 class GuildSettings(BaseModel):
 
     TYPE_ROLE = 'role'
@@ -104,9 +215,9 @@ class GuildSettings(BaseModel):
         default, _type = GuildSettings.SETTINGS[setting_key]
 
         # Return a default value if the setting hasn't been defined
-        try:
-            setting = GuildSettings.get((GuildSettings.name == setting_key) & (GuildSettings.guild_id == ctx.guild.id))  # type: GuildSettings
-        except DoesNotExist:
+        setting = await db_executor.read(GuildSettings.get_or_none,
+                                         (GuildSettings.name == setting_key) & (GuildSettings.guild_id == ctx.guild.id))  # type: GuildSettings
+        if setting is None:
             return default
 
         # TYPE CASTING
@@ -126,11 +237,13 @@ class GuildSettings(BaseModel):
         if _type == GuildSettings.TYPE_ROLE:
             setting_value = setting_value.id
 
-        GuildSettings.delete().where((GuildSettings.guild_id == ctx.guild.id) & (GuildSettings.name == setting_key)).execute()
-        return GuildSettings.create(guild_id=ctx.guild.id, name=setting_key, value=setting_value)
+        def _set():
+            GuildSettings.delete().where((GuildSettings.guild_id == ctx.guild.id) & (GuildSettings.name == setting_key)).execute()
+            return GuildSettings.create(guild_id=ctx.guild.id, name=setting_key, value=setting_value)
+
+        return await db_executor.write(_set)
 
     @staticmethod
     async def all(ctx: commands.context.Context):
-        settings = GuildSettings.select().where(GuildSettings.guild_id == ctx.guild.id).execute()
-        return list(settings)
+        return await db_executor.read(lambda: list(GuildSettings.select().where(GuildSettings.guild_id == ctx.guild.id)))
 
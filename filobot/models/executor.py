@@ -0,0 +1,80 @@
+import asyncio
+import functools
+import logging
+import threading
+import time
+import typing
+from concurrent.futures import ThreadPoolExecutor
+
+from peewee import Database
+
+
+class DatabaseExecutor:
+    """
+    Runs blocking database calls off the event loop
+    Writes are serialized on a single writer thread (SQLite only allows one writer at a time anyway), while reads run on
+    a small pool of reader threads. Every thread gets its own connection from peewee.
+    """
+
+    READERS = 4
+    SLOW_CALL = 0.1  # Calls taking longer than this many seconds are logged
+
+    def __init__(self, database: Database, readers: int = READERS):
+        self._log = logging.getLogger(__name__)
+        self._db = database
+
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='db-writer')
+        self._readers = ThreadPoolExecutor(max_workers=readers, thread_name_prefix='db-reader')
+
+        # Time spent running database calls in the executor, i.e. time the event loop would have been blocked for
+        self._lock = threading.Lock()
+        self.calls = {'read': 0, 'write': 0}
+        self.busy = {'read': 0.0, 'write': 0.0}
+        self.slowest = {'read': 0.0, 'write': 0.0}
+
+    async def read(self, func: typing.Callable, *args, **kwargs):
+        """
+        Run a read-only database call on the reader pool
+        """
+        return await self._run(self._readers, 'read', func, *args, **kwargs)
+
+    async def write(self, func: typing.Callable, *args, **kwargs):
+        """
+        Run a database call on the writer thread, inside a transaction
+        """
+        return await self._run(self._writer, 'write', func, *args, **kwargs)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                kind: {
+                    'calls'    : self.calls[kind],
+                    'busy'     : round(self.busy[kind], 3),
+                    'slowest'  : round(self.slowest[kind], 3),
+                } for kind in self.calls
+            }
+
+    def shutdown(self) -> None:
+        self._readers.shutdown(wait=True)
+        self._writer.shutdown(wait=True)
+
+    async def _run(self, pool: ThreadPoolExecutor, kind: str, func: typing.Callable, *args, **kwargs):
+        call = functools.partial(self._timed, kind, func, *args, **kwargs)
+        return await asyncio.get_event_loop().run_in_executor(pool, call)
+
+    def _timed(self, kind: str, func: typing.Callable, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            if kind == 'write':
+                with self._db.atomic():
+                    return func(*args, **kwargs)
+            return func(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.calls[kind] += 1
+                self.busy[kind] += elapsed
+                self.slowest[kind] = max(self.slowest[kind], elapsed)
+
+            if elapsed > self.SLOW_CALL:
+                self._log.warning(f"Slow database {kind} took {elapsed:.3f}s ({getattr(func, '__name__', func)!r})")
@@ -0,0 +1,269 @@
+import logging
+import time
+import typing
+
+from peewee import BooleanField, CharField, Database, EXCLUDED, IntegerField, Model
+
+from . import BaseModel, SchemaVersion
+
+log = logging.getLogger(__name__)
+
+# Rows handled per transaction by chunked(), so a large backfill never holds the write lock for long
+CHUNK_SIZE = 1000
+
+# version -> (name, migration), filled in by the @migration decorator
+MIGRATIONS = {}  # type: typing.Dict[int, typing.Tuple[str, typing.Callable[[Database], None]]]
+
+
+def migration(version: int, transaction: bool = True):
+    """
+    Register a schema migration
+    Migrations run once, in version order, and are recorded in the SchemaVersion table. Unless transaction is False
+    (for migrations that commit their own work in chunks), a migration runs inside a single transaction along with
+    recording its version.
+    """
+    def decorator(func: typing.Callable[[Database], None]):
+        if version in MIGRATIONS:
+            raise ValueError(f"Duplicate schema migration version {version}")
+
+        func.transaction = transaction
+        MIGRATIONS[version] = (func.__name__, func)
+        return func
+
+    return decorator
+
+
+def chunked(database: Database, model: typing.Type[Model], func: typing.Callable[[typing.List[Model]], None],
+            where=None, size: int = CHUNK_SIZE) -> int:
+    """
+    Call func with every row of model (optionally filtered), in primary key order, one transaction per chunk
+    Returns the number of rows processed.
+    """
+    pk = model._meta.primary_key
+    last, total = None, 0
+    while True:
+        query = model.select().order_by(pk).limit(size)
+        if where is not None:
+            query = query.where(where)
+        if last is not None:
+            query = query.where(pk > last)
+
+        with database.atomic():
+            rows = list(query)
+            if not rows:
+                return total
+            func(rows)
+
+        last = getattr(rows[-1], pk.name)
+        total += len(rows)
+
+
+def current_version(database: Database) -> int:
+    database.create_tables([SchemaVersion])
+    latest = SchemaVersion.select().order_by(SchemaVersion.version.desc()).first()
+    return latest.version if latest else 0
+
+
+def migrate(database: Database, models: typing.List[typing.Type[Model]]) -> int:
+    """
+    Create the tables for models and apply every pending migration, run at startup
+    A new database is created straight from the models and marked as fully migrated. Existing databases are migrated
+    first and only then have any missing tables created, so migrations always see the schema they were written for.
+    Returns the resulting schema version.
+    """
+    if not database.get_tables():
+        database.create_tables([SchemaVersion] + models)
+        SchemaVersion.insert_many([{'version': v, 'name': name} for v, (name, _) in MIGRATIONS.items()]).execute()
+        log.info("Created a new database")
+        return max(MIGRATIONS, default=0)
+
+    version = current_version(database)
+    pending = sorted(v for v in MIGRATIONS if v > version)
+    for version in pending:
+        name, func = MIGRATIONS[version]
+        log.info(f"Applying schema migration {version} ({name})")
+        start = time.monotonic()
+
+        if func.transaction:
+            with database.atomic():
+                func(database)
+                SchemaVersion.create(version=version, name=name)
+        else:
+            func(database)
+            SchemaVersion.create(version=version, name=name)
+
+        log.info(f"Schema migration {version} applied in {time.monotonic() - start:.2f}s")
+
+    database.create_tables(models)
+
+    if pending:
+        # Give the query planner fresh statistics for whatever changed
+        database.execute_sql('ANALYZE')
+    else:
+        log.debug(f"Database schema is up to date (version {version})")
+
+    return version
+
+
+# Migrations describe the schema as it was when they were written, so they use SQL (or frozen models) rather than the
+# current model definitions
+
+@migration(1)
+def composite_indexes(database: Database) -> None:
+    """
+    Replace the single column indexes on the hot lookup paths with composite indexes matching how they're queried
+    """
+    database.execute_sql('CREATE INDEX IF NOT EXISTS "subscriptions_world_category_event" ON "subscriptions" ("world", "category", "event")')
+    database.execute_sql('CREATE INDEX IF NOT EXISTS "subscriptionsmeta_channel_id_name" ON "subscriptionsmeta" ("channel_id", "name")')
+    database.execute_sql('CREATE INDEX IF NOT EXISTS "killlog_world_hunt_name_found" ON "killlog" ("world", "hunt_name", "found")')
+
+    # Single column indexes made redundant by the composite indexes
+    for index in ('subscriptions_world', 'subscriptionsmeta_channel_id', 'killlog_world'):
+        database.execute_sql(f'DROP INDEX IF EXISTS "{index}"')
+
+
+class _SubscriptionsMeta(BaseModel):
+    """
+    SubscriptionsMeta as of migration 2
+    """
+    channel_id = IntegerField()
+    name = CharField()
+    value = CharField()
+
+    class Meta:
+        table_name = 'subscriptionsmeta'
+
+
+class _RelayCounters(BaseModel):
+    """
+    RelayCounters as of migration 2
+    """
+    channel_id = IntegerField()
+    rank = CharField(max_length=1)
+    count = IntegerField(default=0)
+
+    class Meta:
+        table_name = 'relaycounters'
+
+
+# Peewee names indexes after the model class, so frozen models name theirs explicitly to match the live model's
+_RelayCounters.add_index(_RelayCounters.channel_id, _RelayCounters.rank, unique=True, name='relaycounters_channel_id_rank')
+
+
+@migration(2, transaction=False)
+def relay_counters(database: Database) -> None:
+    """
+    Move the relay counters stored as strings in SubscriptionsMeta into integer RelayCounters rows
+    """
+    _RelayCounters.create_table()
+
+    def backfill(rows: typing.List[_SubscriptionsMeta]) -> None:
+        _RelayCounters.insert_many([
+            {'channel_id': meta.channel_id, 'rank': meta.name[0], 'count': int(meta.value)} for meta in rows
+        ]).on_conflict_ignore().execute()
+
+    counters = _SubscriptionsMeta.name.in_(('a_count', 's_count'))
+    total = chunked(database, _SubscriptionsMeta, backfill, counters)
+    if total:
+        log.info(f"Migrated {total} relay counter(s) from SubscriptionsMeta")
+
+        # Nothing reads the old rows anymore
+        with database.atomic():
+            _SubscriptionsMeta.delete().where(counters).execute()
+
+
+@migration(3)
+def dedupe_subscriptions(database: Database) -> None:
+    """
+    Remove duplicate subscriptions left behind by sub-all never clearing the rows it meant to overwrite
+    """
+    cursor = database.execute_sql(
+        'DELETE FROM "subscriptions" WHERE "id" NOT IN '
+        '(SELECT MIN("id") FROM "subscriptions" GROUP BY "channel_id", "world", "category", "event")'
+    )
+    if cursor.rowcount:
+        log.info(f"Removed {cursor.rowcount} duplicate subscription(s)")
+
+
+class _EventSubscriptions(BaseModel):
+    """
+    Subscriptions as stored before migration 4, one row per condition
+    """
+    channel_id = IntegerField()
+    world = CharField()
+    category = CharField()
+    event = CharField()
+
+    class Meta:
+        table_name = 'subscriptions_old'
+
+
+# Condition bits as of migration 4
+_CONDITION_BITS = {'finds': 1, 'deaths': 2, 'openings': 4}
+
+
+class _MaskSubscriptions(BaseModel):
+    """
+    Subscriptions as of migration 4, one row per (channel, world or datacenter, category) with a condition bitmask
+    """
+    channel_id = IntegerField()
+    world = CharField()
+    datacenter = BooleanField(default=False)
+    category = CharField()
+    conditions = IntegerField(default=0)
+
+    class Meta:
+        table_name = 'subscriptions'
+
+
+_MaskSubscriptions.add_index(_MaskSubscriptions.channel_id, _MaskSubscriptions.world, _MaskSubscriptions.category, unique=True,
+                             name='subscriptions_channel_id_world_category')
+_MaskSubscriptions.add_index(_MaskSubscriptions.world, _MaskSubscriptions.category, name='subscriptions_world_category')
+
+
+@migration(4, transaction=False)
+def subscription_bitmasks(database: Database) -> None:
+    """
+    Fold the per-condition subscription rows into one row per (channel, world, category) with a condition bitmask
+    The old table is renamed aside and copied over in chunks; merging is idempotent, so an interrupted run resumes by
+    copying it again.
+    """
+    if 'subscriptions_old' not in database.get_tables():
+        with database.atomic():
+            database.execute_sql('ALTER TABLE "subscriptions" RENAME TO "subscriptions_old"')
+
+            # Indexes keep their names when renamed, which would clash with the new table's
+            indexes = database.execute_sql(
+                "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'subscriptions_old' AND sql IS NOT NULL"
+            ).fetchall()
+            for (index,) in indexes:
+                database.execute_sql(f'DROP INDEX "{index}"')
+
+            _MaskSubscriptions.create_table()
+
+    def merge(rows: typing.List[_EventSubscriptions]) -> None:
+        masks = {}
+        for row in rows:
+            key = (row.channel_id, row.world, row.category)
+            masks[key] = masks.get(key, 0) | _CONDITION_BITS.get(row.event, 0)
+
+        _MaskSubscriptions.insert_many([
+            {'channel_id': channel_id, 'world': world, 'category': category, 'conditions': mask}
+            for (channel_id, world, category), mask in masks.items()
+        ]).on_conflict(
+                conflict_target=[_MaskSubscriptions.channel_id, _MaskSubscriptions.world, _MaskSubscriptions.category],
+                update={_MaskSubscriptions.conditions: _MaskSubscriptions.conditions.bin_or(EXCLUDED.conditions)}
+        ).execute()
+
+    total = chunked(database, _EventSubscriptions, merge)
+    database.execute_sql('DROP TABLE "subscriptions_old"')
+    log.info(f"Folded {total} subscription row(s) into {_MaskSubscriptions.select().count()} condition bitmask(s)")
+
+
+@migration(5)
+def drop_duplicate_indexes(database: Database) -> None:
+    """
+    Drop the indexes migrations 2 and 4 created under their frozen models' names, duplicating the live models' indexes
+    """
+    for index in ('_relaycounters_channel_id_rank', '_masksubscriptions_channel_id_world_category', '_masksubscriptions_world_category'):
+        database.execute_sql(f'DROP INDEX IF EXISTS "{index}"')
@@ -5,7 +5,9 @@ import discord
 from aiohttp import web
 
 from filobot.filobot import bot, GAMES, hunt_manager, log
-from filobot.models import Player
+from filobot.models import db_executor, Player
+from filobot.utilities.ingest import IngestQueue
+from filobot.utilities.sources import TrackerSource
 import filobot.utilities.worlds as worlds
 
 import json
@@ -13,6 +15,9 @@ import json
 import logging
 logger = logging.getLogger(__name__)
 
+# In-game tracker reports, from both the webhook server and the Discord relay channel
+tracker = hunt_manager.pipeline.register(TrackerSource())
+
 # noinspection PyBroadException
 async def update_hunts():
     await bot.wait_until_ready()
@@ -22,7 +27,46 @@ async def update_hunts():
             await hunt_manager.recheck()
         except Exception:
             log.exception('Exception thrown while reloading hunts')
-        await asyncio.sleep(7.0)
+        await asyncio.sleep(hunt_manager.poll_interval())
+
+
+async def update_transitions():
+    await bot.wait_until_ready()
+    await hunt_manager.scheduler.run()
+
+
+async def process_events():
+    await bot.wait_until_ready()
+    hunt_manager.pipeline.start()
+
+
+async def deliver_notifications():
+    await bot.wait_until_ready()
+    await hunt_manager.outbox.run()
+
+
+# noinspection PyBroadException
+async def flush_counters():
+    await bot.wait_until_ready()
+
+    while not bot.is_closed():
+        await asyncio.sleep(60.0)
+        try:
+            await hunt_manager.counter.flush()
+        except Exception:
+            log.exception('Exception thrown while flushing relay counters')
+
+
+# noinspection PyBroadException
+async def purge_notifications():
+    await bot.wait_until_ready()
+
+    while not bot.is_closed():
+        try:
+            await hunt_manager.purge_notifications()
+        except Exception:
+            log.exception('Exception thrown while purging notifications')
+        await asyncio.sleep(600.0)
 
 
 # noinspection PyBroadException
@@ -50,30 +94,76 @@ async def _process_data(data):
         logger.warning(data)
 
 
+async def _process_batch(reports) -> int:
+    """
+    Process a batch of reports in order, returning the number of reports that failed
+    """
+    failed = 0
+    for data in reports:
+        # noinspection PyBroadException
+        try:
+            await _process_data(data)
+        except Exception:
+            failed += 1
+            logger.exception(f"Exception thrown while processing report {data.get('id') if isinstance(data, dict) else data!r}")
+
+    return failed
+
+
+def _parse_batch(body: str, ndjson: bool = False) -> list:
+    """
+    Parse a JSON array / object or newline-delimited JSON body into a list of reports
+    """
+    if not ndjson:
+        data = json.loads(body)
+        return data if isinstance(data, list) else [data]
+
+    return [json.loads(line) for line in body.splitlines() if line.strip()]
+
+
+def _parse_relay(content: str) -> list:
+    """
+    Parse a relay channel message, either a single JSON document (possibly pretty-printed) or newline-delimited JSON
+    Lines that can't be parsed and entries that aren't reports are logged and skipped, as the webhook does
+    """
+    try:
+        reports = _parse_batch(content)
+    except ValueError:
+        reports = []
+        for line in content.splitlines():
+            if not line.strip():
+                continue
+            try:
+                reports.append(json.loads(line))
+            except ValueError:
+                logger.warning(f"Ignoring unparseable relay line: {line[:200]!r}")
+
+    valid = [r for r in reports if isinstance(r, dict) and _is_report(r)]
+    if len(valid) != len(reports):
+        logger.warning(f"Ignoring {len(reports) - len(valid)} malformed relay report(s)")
+
+    return valid
+
+
+def _is_report(data) -> bool:
+    """
+    Check whether the posted data looks like a hunt or fate report
+    """
+    return 'id' in data.keys() and ('r' in data.keys() or 'duration' in data.keys())
+
+
 async def _process_hunt(data):
     try:
-        alive   = data['lastAlive'] == 'True'
-        world   = hunt_manager.get_world(int(data['wId']))
-        hunt    = hunt_manager.horus.id_to_hunt(data['id'])
-        _plus   = 22.5 if hunt['ZoneName'] in hunt_manager.HW_ZONES else 21.5
-        x, y    = round((float(data['x']) * 0.02 + _plus)*10)/10, round((float(data['y']) * 0.02 + _plus)*10)/10
-        xivhunt = {
-            'rank': data['r'],
-            'i': data['i'],
-            'status': 'seen' if alive else 'dead',
-            'last_seen': data['lastReported'],
-            'coords': f"{x}, {y}",
-            'world': world,
-        }
-
-    except IndexError:
+        event = tracker.normalize(data)
+    except ValueError as e:
+        logger.warning(f"Ignoring malformed hunt report: {e}")
         return
-
-    if not alive:
-        # TODO: Deaths
+    except LookupError:
+        logger.warning(f"Ignoring report of unknown hunt {data['id']}")
         return
 
-    return await hunt_manager.on_find(world, hunt['Name'], xivhunt, int(data['i']) or 1)
+    # Waits while the pipeline is backed up, so the ingest queue fills and the webhook starts answering 429
+    await tracker.put(event)
 
 
 async def _process_fate(data):
@@ -88,21 +178,49 @@ async def discord_listener(channel):
         if str(message.channel.id) != channel:
             return;
 
-        data = json.loads(message.content)
-        await _process_data(data)
+        await _process_batch(_parse_relay(message.content))
         return
 
     bot.add_listener(on_message)
     return
 
 
-async def start_server(addr, port):
+async def start_server(addr, port, queue_size=IngestQueue.QUEUE_SIZE, workers=IngestQueue.WORKERS):
+    ingest = IngestQueue(_process_batch, queue_size, workers)
+    ingest.start()
+
     async def event(request):
-        data = await request.post()
-        await _process_data(data)
-        return web.Response(text='200')
+        # Batches are posted as a JSON array or as newline-delimited JSON, single reports as form data
+        if request.content_type in ('application/json', 'application/x-ndjson', 'application/jsonl'):
+            try:
+                reports = _parse_batch(await request.text(), request.content_type != 'application/json')
+            except ValueError:
+                return web.Response(status=400, text='400')
+        else:
+            reports = [dict(await request.post())]
+
+        valid = [r for r in reports if isinstance(r, dict) and _is_report(r)]
+        if len(valid) != len(reports):
+            logger.warning(f"Rejecting {len(reports) - len(valid)} malformed report(s)")
+        if not valid:
+            return web.Response(status=400, text='400')
+
+        if not ingest.running:
+            return web.Response(status=503, text='503')
+
+        if not ingest.put_batch(valid):
+            return web.Response(status=429, text='429', headers={'Retry-After': '1'})
+
+        if request.content_type == 'application/x-www-form-urlencoded' or len(reports) == 1:
+            return web.Response(text='200')
+
+        return web.json_response({'accepted': len(valid), 'rejected': len(reports) - len(valid)})
+
+    async def metrics(request):
+        return web.json_response({**ingest.metrics(), 'sources': hunt_manager.pipeline.metrics(), 'database': db_executor.metrics()})
 
     app = web.Application()
+    app.router.add_route('GET', '/metrics', metrics)
     app.router.add_route('POST', '/{tail:.*}', event)
 
     runner = web.AppRunner(app)
@@ -126,7 +244,7 @@ async def track_stats():
         a_count, s_count = await hunt_manager.count()
         a_count = "{:,}".format(a_count)
         s_count = "{:,}".format(s_count)
-        player_count = Player.select().where(Player.status == Player.STATUS_VERIFIED).count()
+        player_count = await db_executor.read(lambda: Player.select().where(Player.status == Player.STATUS_VERIFIED).count())
         player_count = "{:,}".format(player_count)
 
         s_stats = bot.get_channel(650987949026181120)  # type: discord.VoiceChannel
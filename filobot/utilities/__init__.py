@@ -1,15 +1,10 @@
-import json
-import os
-import sys
 import time
 import arrow
 import discord
 import typing
+from filobot.utilities.marks import marks, Mark, ALIASES
 from filobot.utilities.worlds import Worlds
 
-with open(os.path.dirname(os.path.realpath(sys.argv[0])) + os.sep + os.path.join('data', 'marks_info.json')) as json_file:
-    marks_info = json.load(json_file)
-
 COLOR_A = 0xFB6107
 COLOR_S = 0xF3DE2C
 COLOR_B = 0x7CB518
@@ -65,107 +60,118 @@ MAPS = {
 
 SB_HUNTS   = ['erle', 'orcus', 'aqrabuamelu', 'vochstein', 'luminare', 'mahisha', 'funa yurei', 'oni yumemi',
               'angada', 'gajasura', 'girimekhala', 'sum']
-SB_ALIASES = [('aqra', 'aqrabuamelu'), ('voch', 'vochstein'), ('lumi', 'luminare'), ('mahi', 'mahisha'),
-              ('funa', 'funa yurei'), ('oni', 'oni yumemi'), ('anga', 'angada'), ('gaja', 'gajasura'),
-              ('giri', 'girimekhala')]
+SB_ALIASES = list(ALIASES.items())
+
+
+# Pre-rendered static embed parts, keyed by (embed type, mark ID, status, ...)
+_embed_templates = {}
 
 
 def hunt_simple_embed(hunt_name: str, horus: typing.Optional = None, xivhunt: typing.Optional = None) -> discord.Embed:
-    for _id, mark in marks_info.items():
-        if hunt_name.strip().lower() == mark['Name'].lower():
-            embed = discord.Embed()
-            embed.title = f"Rank {mark['Rank']}: {mark['Name']}"
-
-            # Default rank-based colors (overwritten if horus status is provided)
-            if mark['Rank'] == 'A':
-                embed.colour = COLOR_A
-            elif mark['Rank'] == 'S':
-                embed.colour = COLOR_S
-            elif mark['Rank'] == 'B':
-                embed.colour = COLOR_B
-
-            instance = 0
-            if xivhunt is not None and xivhunt['i']:
-                instance = int(xivhunt['i']) or 1
-            else:
-                instance = horus.instance
-
-            world = ""
-            if xivhunt is not None and xivhunt['world']:
-                world = xivhunt['world']
-            else:
-                world = horus.world
-
-            if horus is not None:
-                # Horus status based color-coding
-                if horus.status == horus.STATUS_OPENED:
-                    embed.colour = COLOR_OPEN
-                elif horus.status == horus.STATUS_MAXED:
-                    embed.colour = COLOR_MAXED
-                elif horus.status == horus.STATUS_DIED:
-                    embed.colour = COLOR_DIED
-                    embed.title += " DEAD"
-                else:
-                    embed.colour = COLOR_CLOSED
-                    embed.title += " DEAD"
-
-            return embed
+    mark = marks.find(hunt_name)
+    if mark is None:
+        return
+
+    key = ('simple', mark.id, horus.status if horus is not None else None)
+    if key not in _embed_templates:
+        _embed_templates[key] = _simple_embed_template(mark, horus)
+
+    return _embed_templates[key].copy()
+
+
+def _simple_embed_template(mark: Mark, horus: typing.Optional = None) -> discord.Embed:
+    embed = discord.Embed()
+    embed.title = f"Rank {mark.rank}: {mark.name}"
+
+    # Default rank-based colors (overwritten if horus status is provided)
+    if mark.rank == 'A':
+        embed.colour = COLOR_A
+    elif mark.rank == 'S':
+        embed.colour = COLOR_S
+    elif mark.rank == 'B':
+        embed.colour = COLOR_B
+
+    if horus is not None:
+        # Horus status based color-coding
+        if horus.status == horus.STATUS_OPENED:
+            embed.colour = COLOR_OPEN
+        elif horus.status == horus.STATUS_MAXED:
+            embed.colour = COLOR_MAXED
+        elif horus.status == horus.STATUS_DIED:
+            embed.colour = COLOR_DIED
+            embed.title += " DEAD"
+        else:
+            embed.colour = COLOR_CLOSED
+            embed.title += " DEAD"
+
+    return embed
 
 
 def hunt_embed(hunt_name: str, horus: typing.Optional = None, xivhunt: typing.Optional = None) -> discord.Embed:
-    for _id, mark in marks_info.items():
-        if hunt_name.strip().lower() == mark['Name'].lower():
-            embed = discord.Embed(title=mark['Name'], description=f"""Rank {mark['Rank']}""")
-            embed.set_thumbnail(url=mark['Image'])
-
-            # Default rank-based colors (overwritten if horus status is provided)
-            if mark['Rank'] == 'A':
-                embed.colour = COLOR_A
-            elif mark['Rank'] == 'S':
-                embed.colour = COLOR_S
-            elif mark['Rank'] == 'B':
-                embed.colour = COLOR_B
-
-            embed.add_field(name='Zone', value=mark['ZoneName'])
-            embed.add_field(name='Region', value=mark['RegionName'])
-
-            # Only display spawning tips if the hunt is open
-            if horus is None or horus.status in (horus.STATUS_OPENED, horus.STATUS_MAXED):
-                if mark['SpawnTrigger']:
-                    embed.add_field(name='Spawn trigger', value=mark['SpawnTrigger'])
-
-                if mark['Tips']:
-                    embed.add_field(name='Tips', value=mark['Tips'])
-
-                # Don't show the map if the hunt location has already been found
-                if xivhunt is None or not xivhunt['coords']:
-                    if hunt_name.title() in MAPS:
-                        embed.set_image(url=MAPS[hunt_name.title()])
-
-            if horus is not None:
-                # Horus status based color-coding
-                if horus.status == horus.STATUS_OPENED:
-                    embed.colour = COLOR_OPEN
-                elif horus.status == horus.STATUS_MAXED:
-                    embed.colour = COLOR_MAXED
-                elif horus.status == horus.STATUS_DIED:
-                    embed.colour = COLOR_DIED
-                else:
-                    embed.colour = COLOR_CLOSED
-
-                embed.add_field(name='Status', value=horus.status.title(), inline=False)
-
-                if horus.last_mark:
-                    last_mark = arrow.get(horus.last_mark / 1000).format("MMM Do, H:mma ZZZ")
-                    footer = f"""Marked {last_mark}"""
-                    if horus.last_try_user != 'N/A':
-                        footer = footer + f""" by {horus.last_try_user}"""
-                    embed.set_footer(text=footer)
-
-            return embed
-
-    # No hunt by the specified name found
-    raise KeyError
+    mark = marks.find(hunt_name)
+    if mark is None:
+        # No hunt by the specified name found
+        raise KeyError
+
+    has_coords = xivhunt is not None and bool(xivhunt['coords'])
+    key = ('full', mark.id, horus.status if horus is not None else None, has_coords)
+    if key not in _embed_templates:
+        _embed_templates[key] = _embed_template(mark, horus, has_coords)
+
+    embed = _embed_templates[key].copy()
+
+    if horus is not None and horus.last_mark:
+        last_mark = arrow.get(horus.last_mark / 1000).format("MMM Do, H:mma ZZZ")
+        footer = f"""Marked {last_mark}"""
+        if horus.last_try_user != 'N/A':
+            footer = footer + f""" by {horus.last_try_user}"""
+        embed.set_footer(text=footer)
+
+    return embed
+
+
+def _embed_template(mark: Mark, horus: typing.Optional = None, has_coords: bool = False) -> discord.Embed:
+    embed = discord.Embed(title=mark.name, description=f"""Rank {mark.rank}""")
+    embed.set_thumbnail(url=mark.image)
+
+    # Default rank-based colors (overwritten if horus status is provided)
+    if mark.rank == 'A':
+        embed.colour = COLOR_A
+    elif mark.rank == 'S':
+        embed.colour = COLOR_S
+    elif mark.rank == 'B':
+        embed.colour = COLOR_B
+
+    embed.add_field(name='Zone', value=mark.zone)
+    embed.add_field(name='Region', value=mark.region)
+
+    # Only display spawning tips if the hunt is open
+    if horus is None or horus.status in (horus.STATUS_OPENED, horus.STATUS_MAXED):
+        if mark.spawn_trigger:
+            embed.add_field(name='Spawn trigger', value=mark.spawn_trigger)
+
+        if mark.tips:
+            embed.add_field(name='Tips', value=mark.tips)
+
+        # Don't show the map if the hunt location has already been found
+        if not has_coords:
+            if mark.name.title() in MAPS:
+                embed.set_image(url=MAPS[mark.name.title()])
+
+    if horus is not None:
+        # Horus status based color-coding
+        if horus.status == horus.STATUS_OPENED:
+            embed.colour = COLOR_OPEN
+        elif horus.status == horus.STATUS_MAXED:
+            embed.colour = COLOR_MAXED
+        elif horus.status == horus.STATUS_DIED:
+            embed.colour = COLOR_DIED
+        else:
+            embed.colour = COLOR_CLOSED
+
+        embed.add_field(name='Status', value=horus.status.title(), inline=False)
+
+    return embed
 
 
 def parse_sb_hunt_name(hunt_name: str) -> str:
@@ -176,12 +182,9 @@ def parse_sb_hunt_name(hunt_name: str) -> str:
 
     if name not in SB_HUNTS:
         # Shortened hunt name?
-        for alias, replacement in SB_ALIASES:
-            if name == alias:
-                name = replacement
-                break
-        else:
+        if name not in ALIASES:
             raise KeyError
+        name = ALIASES[name]
 
     return name
 
@@ -0,0 +1,65 @@
+import logging
+import typing
+
+from peewee import fn
+
+from filobot.models import db_executor, RelayCounters
+
+
+class RelayCounter:
+    """
+    Per-channel relay counters
+    Increments are kept in memory and written to the RelayCounters table in batched transactions, while the global
+    totals are cached so reading them never touches the database
+    """
+
+    def __init__(self):
+        self._log = logging.getLogger(__name__)
+
+        self._pending = {}  # (channel_id, rank) -> count not yet flushed
+        self._totals = {'a': 0, 's': 0}
+
+    def load(self) -> None:
+        """
+        Load the cached totals from the database
+        """
+        self._totals = {'a': 0, 's': 0}
+        for row in RelayCounters.select(RelayCounters.rank, fn.SUM(RelayCounters.count).alias('total')).group_by(RelayCounters.rank):
+            self._totals[row.rank] = int(row.total or 0)
+
+    def increment(self, channel_id: int, rank: str) -> None:
+        rank = rank.lower()
+        key = (channel_id, rank)
+        self._pending[key] = self._pending.get(key, 0) + 1
+        self._totals[rank] = self._totals.get(rank, 0) + 1
+
+    def totals(self) -> typing.Tuple[int, int]:
+        """
+        Return the total number of A-Ranks and S-Ranks relayed
+        """
+        return self._totals.get('a', 0), self._totals.get('s', 0)
+
+    async def flush(self) -> None:
+        """
+        Write pending increments to the database in a single transaction
+        """
+        if not self._pending:
+            return
+
+        def _flush():
+            for (channel_id, rank), count in pending.items():
+                RelayCounters.insert(channel_id=channel_id, rank=rank, count=count).on_conflict(
+                        conflict_target=[RelayCounters.channel_id, RelayCounters.rank],
+                        update={RelayCounters.count: RelayCounters.count + count}
+                ).execute()
+
+        pending, self._pending = self._pending, {}
+        try:
+            await db_executor.write(_flush)
+        except Exception:
+            # Put the increments back so they're written on the next flush
+            for key, count in pending.items():
+                self._pending[key] = self._pending.get(key, 0) + count
+            raise
+
+        self._log.debug(f"Flushed {len(pending)} relay counter(s)")
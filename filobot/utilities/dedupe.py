@@ -0,0 +1,63 @@
+import collections
+import logging
+import time
+import typing
+
+
+class SightingDeduplicator:
+    """
+    Time-windowed deduplication of hunt sightings
+    The first report of a (world, hunt, instance) is let through, and any further reports within the window are
+    collapsed into it, even if they disagree on coordinates. Entries expire on their own once the window has passed.
+    """
+
+    WINDOW = 3600  # Seconds
+
+    def __init__(self, window: float = WINDOW):
+        self._log = logging.getLogger(__name__)
+        self._window = window
+
+        # (world, hunt, instance) -> [expires, coords], ordered by expiry since the window is fixed
+        self._seen = collections.OrderedDict()
+
+    def check(self, world: str, hunt_name: str, instance: int, coords: typing.Optional[str] = None) -> bool:
+        """
+        Record a sighting, returning True if it's the first one within the window
+        """
+        now = time.monotonic()
+        self._expire(now)
+
+        key = (world, hunt_name.strip().lower(), int(instance))
+        sighting = self._seen.get(key)
+        if sighting is None:
+            self._seen[key] = [now + self._window, coords]
+            return True
+
+        if coords and coords != sighting[1]:
+            self._log.debug(f"Duplicate sighting of {hunt_name} on {world} (Instance {instance}) reported at {coords}, previously {sighting[1]}")
+            sighting[1] = coords
+
+        return False
+
+    def coords(self, world: str, hunt_name: str, instance: int) -> typing.Optional[str]:
+        """
+        Get the most recently reported coordinates of an active sighting
+        """
+        sighting = self._seen.get((world, hunt_name.strip().lower(), int(instance)))
+        return sighting[1] if sighting else None
+
+    def forget(self, world: str, hunt_name: str, instance: int) -> None:
+        """
+        Forget a sighting (e.g. once the hunt has died) so the next report is treated as new
+        """
+        self._seen.pop((world, hunt_name.strip().lower(), int(instance)), None)
+
+    def __len__(self):
+        return len(self._seen)
+
+    def _expire(self, now: float) -> None:
+        while self._seen:
+            key, (expires, coords) = next(iter(self._seen.items()))
+            if expires > now:
+                break
+            del self._seen[key]
@@ -0,0 +1,141 @@
+import asyncio
+import collections
+import heapq
+import itertools
+import logging
+import time
+import typing
+
+
+class RateLimiter:
+    """
+    Simple token bucket rate limiter
+    """
+
+    def __init__(self, rate: float, burst: typing.Optional[int] = None):
+        self._rate = rate
+        self._burst = burst or int(rate)
+        self._tokens = float(self._burst)
+        self._updated = time.monotonic()
+
+    async def acquire(self) -> None:
+        while True:
+            now = time.monotonic()
+            self._tokens = min(self._burst, self._tokens + (now - self._updated) * self._rate)
+            self._updated = now
+
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+
+            await asyncio.sleep((1 - self._tokens) / self._rate)
+
+
+class Dispatcher:
+    """
+    Concurrent notification fan-out
+    Sends are queued per channel by priority and drained by a fixed pool of workers (the global budget), while each
+    channel is limited to a single in-flight request to match Discord's per-channel rate limit buckets. Workers only
+    pick up channels that are below that limit, so a busy channel can't tie them up while others are waiting.
+    """
+
+    PRIORITY_S = 0
+    PRIORITY_A = 1
+    PRIORITY_DEFAULT = 2
+
+    WORKERS = 10                # Global number of concurrent sends
+    GLOBAL_RATE = 40            # Requests per second, kept under Discord's global limit of 50
+    CHANNEL_CONCURRENCY = 1     # Concurrent sends per channel
+
+    def __init__(self, workers: int = WORKERS):
+        self._log = logging.getLogger(__name__)
+        self._workers = workers
+
+        self._ready = None  # type: typing.Optional[asyncio.PriorityQueue]
+        self._tasks = []
+        self._sequence = itertools.count()
+        self._limiter = RateLimiter(self.GLOBAL_RATE)
+        self._pending = {}  # channel_id -> heap of (priority, sequence, callback, future)
+        self._active = {}   # channel_id -> number of in-flight sends
+
+        # Recent delivery latencies as (label, channels, first delivery, last delivery) in seconds
+        self.latencies = collections.deque(maxlen=100)
+
+    def priority(self, rank: str) -> int:
+        if rank == 'S':
+            return self.PRIORITY_S
+        if rank == 'A':
+            return self.PRIORITY_A
+        return self.PRIORITY_DEFAULT
+
+    async def fan_out(self, channels: typing.Iterable[int], callback: typing.Callable[[int], typing.Awaitable],
+                      priority: int = PRIORITY_DEFAULT, label: str = 'event') -> typing.List:
+        """
+        Run callback for every channel concurrently and wait for all of them to complete
+        Returns the result of each callback (or None if it raised an exception) in channel order
+        """
+        self._start()
+
+        start = time.monotonic()
+        futures = []
+        for channel in channels:
+            future = asyncio.get_event_loop().create_future()
+            heapq.heappush(self._pending.setdefault(channel, []), (priority, next(self._sequence), callback, future))
+            self._wake(channel)
+            futures.append(future)
+
+        if not futures:
+            return []
+
+        results = await asyncio.gather(*futures)
+
+        delivered = [finished - start for result, finished in results if finished is not None]
+        if delivered:
+            self.latencies.append((label, len(delivered), min(delivered), max(delivered)))
+            self._log.info(f"Delivered {label} to {len(delivered)} channel(s) in {min(delivered):.2f}s - {max(delivered):.2f}s")
+
+        return [result for result, finished in results]
+
+    def _start(self) -> None:
+        if self._ready is not None:
+            return
+
+        self._ready = asyncio.PriorityQueue()
+        self._tasks = [asyncio.ensure_future(self._worker()) for _ in range(self._workers)]
+
+    def _wake(self, channel: int) -> None:
+        """
+        Mark a channel as ready at the priority of its next send, if it has one and is below its concurrency limit
+        Channels may be queued more than once; workers skip entries that are no longer actionable
+        """
+        pending = self._pending.get(channel)
+        if pending and self._active.get(channel, 0) < self.CHANNEL_CONCURRENCY:
+            priority, sequence = pending[0][:2]
+            self._ready.put_nowait((priority, sequence, channel))
+
+    async def _worker(self) -> None:
+        while True:
+            _, _, channel = await self._ready.get()
+
+            pending = self._pending.get(channel)
+            if not pending or self._active.get(channel, 0) >= self.CHANNEL_CONCURRENCY:
+                continue
+
+            priority, _, callback, future = heapq.heappop(pending)
+            if not pending:
+                del self._pending[channel]
+            self._active[channel] = self._active.get(channel, 0) + 1
+
+            # noinspection PyBroadException
+            try:
+                await self._limiter.acquire()
+                result = await callback(channel)
+                future.set_result((result, time.monotonic()))
+            except Exception:
+                self._log.exception(f"Exception thrown while dispatching to channel {channel}")
+                future.set_result((None, None))
+            finally:
+                self._active[channel] -= 1
+                if not self._active[channel]:
+                    del self._active[channel]
+                self._wake(channel)
@@ -1,19 +1,29 @@
+import hashlib
 import json
 import logging
-import os
 import sys
 import time
+import typing
 
 import aiohttp
 import asyncio
 import async_timeout
 import discord.ext
+from filobot.utilities.marks import marks, Mark
 from filobot.utilities.worlds import Worlds
 
 class Horus:
-    CACHE_TTL = 15
+    CACHE_TTL = 15  # Per datacenter
     ENDPOINT_BASE = 'https://horus-hunts.net/Timers/GetDcTimers/?DC='
 
+    # Connection pool settings
+    REQUEST_TIMEOUT = 10    # Per-endpoint timeout in seconds
+    MAX_CONCURRENCY = 4     # Maximum number of datacenters queried at once
+    KEEPALIVE_TIMEOUT = 60  # Seconds to keep idle connections open
+
+    # Raw timer fields compared between polls to detect changed entries
+    SNAPSHOT_FIELDS = ('lastDeath', 'openDate', 'maxDate', 'lastMark')
+
     def _get_endpoint(self, datacenter: str):
         return f"{self.ENDPOINT_BASE}{datacenter}"
 
@@ -27,54 +37,162 @@ class Horus:
         self._log = logging.getLogger(__name__)
         self._bot = bot
 
-        with open(os.path.dirname(os.path.realpath(sys.argv[0])) + os.sep + os.path.join('data', 'marks_info.json')) as json_file:
-            self.marks_info = json.load(json_file)
-
         self._cached_response = {}
-        self._cached_time = 0
+        self._cached_time = {}  # datacenter -> time of the last successful query
+
+        # Previously seen timer payloads, keyed by world and then (hunt ID, instance)
+        self._snapshots = {}
+
+        # Per-endpoint cache validators (ETag, Last-Modified) and body digests, so unchanged payloads aren't parsed
+        self._validators = {}
+        self._digests = {}
+
+        # Worlds whose datacenter payload changed and haven't been diffed by load_changes yet
+        self._dirty = set()
+
+        # Long-lived pooled session, created lazily on the running event loop
+        self._session = None  # type: typing.Optional[aiohttp.ClientSession]
+        self._semaphore = None  # type: typing.Optional[asyncio.Semaphore]
 
-    async def update_horus(self):
-        if time.time() <= self._cached_time + self.CACHE_TTL:
+    async def update_horus(self, datacenters: typing.Optional[typing.Iterable[str]] = None) -> typing.Dict[str, bool]:
+        """
+        Refresh the cached Horus data for the specified datacenters (all of them by default)
+        Returns whether each datacenter loaded successfully
+        """
+        datacenters = list(datacenters) if datacenters is not None else Worlds.get_datacenters()
+        results = {datacenter: True for datacenter in datacenters}
+
+        now = time.time()
+        stale = [dc for dc in datacenters if now > self._cached_time.get(dc, 0) + self.CACHE_TTL]
+        if not stale:
             self._log.debug("Horus data already up to date")
-        else:
-            self._log.info('Querying Horus')
-            async with aiohttp.ClientSession() as session:
-                for endpoint in self._get_endpoints():
-                    self._log.debug(f"Querying: {endpoint}")
-                    try:
-                        response = json.loads(await self._fetch(session, endpoint))
-                        self._cached_response.update(response)
-                    except:
-                        self._log.exception(f"Exception caught while querying {endpoint}")
-            self._cached_time = time.time()
-
-    async def load(self, world: str):
+            return results
+
+        self._log.info(f"Querying Horus ({', '.join(stale)})")
+        session = self._get_session()
+        responses = await asyncio.gather(*[self._query(session, self._get_endpoint(dc)) for dc in stale])
+        for datacenter, response in zip(stale, responses):
+            if response is None:
+                results[datacenter] = False
+                continue
+
+            if response:
+                self._cached_response.update(response)
+                self._dirty.update(response.keys())
+            self._cached_time[datacenter] = time.time()
+
+        return results
+
+    async def close(self):
+        """
+        Close the pooled Horus session
+        """
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def load_changes(self, world: str):
+        """
+        Load only the hunts on the specified world whose timers changed since the previous call
+        Returns a dict keyed by (hunt ID, instance)
+        """
         response = self._cached_response
         if world not in response.keys():
             raise LookupError(f"""World {world} does not exist""")
         timers = response[world]['timers']
 
+        # Nothing on this world's datacenter changed since it was last diffed
+        if world not in self._dirty:
+            return {}
+        self._dirty.discard(world)
+
+        if world not in self._snapshots:
+            self._snapshots[world] = {}
+        snapshot = self._snapshots[world]
+
         hunts = {}
         for key, timer in timers.items():
-            hunt_data = self.id_to_hunt(timer['Id'])
-            hunts[hunt_data['Name'].strip().lower() + f"_{timer['ins']}"] = HorusHunt(hunt_data, timer, timer['ins'])
+            _id = (timer['Id'], timer['ins'])
+            values = tuple(timer[field] for field in self.SNAPSHOT_FIELDS)
+            if snapshot.get(_id) == values:
+                continue
+
+            snapshot[_id] = values
+            hunts[_id] = HorusHunt(self.id_to_hunt(timer['Id']), timer, timer['ins'])
 
         return hunts
 
-    def id_to_hunt(self, id: str):
+    def id_to_hunt(self, id: str) -> Mark:
         """
         Map Horus hunt ID's to actual hunts
         """
-        id = str(id)
-        if id not in self.marks_info:
-            raise LookupError(f"""ID {id} does not exist""")
+        return marks.by_id(id)
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """
+        Get the pooled Horus session, creating it if needed
+        """
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.MAX_CONCURRENCY, keepalive_timeout=self.KEEPALIVE_TIMEOUT)
+            self._session = aiohttp.ClientSession(connector=connector)
+            self._semaphore = asyncio.Semaphore(self.MAX_CONCURRENCY)
+        return self._session
+
+    async def _query(self, session, endpoint) -> typing.Optional[dict]:
+        """
+        Query a single datacenter endpoint; failures are logged and isolated to that datacenter
+        Returns an empty dict if the payload hasn't changed since the last query
+        """
+        async with self._semaphore:
+            self._log.debug(f"Querying: {endpoint}")
+            try:
+                body, validators = await self._fetch(session, endpoint)
+            except asyncio.TimeoutError:
+                self._log.warning(f"Timed out after {self.REQUEST_TIMEOUT}s while querying {endpoint}")
+                return None
+            except Exception:
+                self._log.exception(f"Exception caught while querying {endpoint}")
+                return None
+
+        # Not modified, either per the server or byte for byte
+        if body is None:
+            return {}
+        digest = hashlib.blake2b(body, digest_size=16).digest()
+        if self._digests.get(endpoint) == digest:
+            self._log.debug(f"Payload from {endpoint} is unchanged")
+            self._validators[endpoint] = validators
+            return {}
+
+        try:
+            data = json.loads(body)
+        except ValueError:
+            self._log.exception(f"Invalid payload received from {endpoint}")
+            return None
 
-        return self.marks_info[id]
+        # Only remember the payload once it's been read and parsed, or a bad response would be treated as current
+        self._digests[endpoint] = digest
+        self._validators[endpoint] = validators
+        return data
+
+    async def _fetch(self, session, url) -> typing.Tuple[typing.Optional[bytes], typing.Tuple[str, str]]:
+        """
+        Fetch a URL, using conditional request headers when the server sent validators previously
+        Returns the body (None if the server responded 304 Not Modified) and the response's validators
+        """
+        headers = {}
+        etag, last_modified = self._validators.get(url, (None, None))
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
 
-    async def _fetch(self, session, url):
-        with async_timeout.timeout(15):
-            async with session.get(url) as response:
-                return await response.text()
+        async with async_timeout.timeout(self.REQUEST_TIMEOUT):
+            async with session.get(url, headers=headers) as response:
+                if response.status == 304:
+                    return None, (etag, last_modified)
+
+                response.raise_for_status()
+                return await response.read(), (response.headers.get('ETag'), response.headers.get('Last-Modified'))
 
 
 class HorusHunt:
@@ -84,19 +202,17 @@ class HorusHunt:
     STATUS_CLOSED = 'closed'
     STATUS_DIED   = 'dead'
 
-    def __init__(self, hunt_data, timer_data, instance=1):
+    # Static hunt data lives on the shared Mark, only the timer data is stored per hunt
+    __slots__ = ('mark', 'instance', 'world', 'min_respawn', 'max_respawn', 'last_death', 'open_date', 'max_date',
+                 'last_alive', 'last_try', 'last_try_user', 'last_mark', 'status')
+
+    def __init__(self, hunt_data: Mark, timer_data, instance=1):
         # Hunt data
-        self.name = hunt_data['Name']
+        self.mark = hunt_data
         self.instance = instance  # 0 = Not an instanced zone, 1-3 = instance number
-        self.rank = hunt_data['Rank']
-        self.image = hunt_data['Image']
-        self.zone = hunt_data['ZoneName']
-        self.region = hunt_data['RegionName']
-        self.spawn_trigger = hunt_data['SpawnTrigger']
-        self.tips = hunt_data['Tips']
 
         # Timer data
-        self.world = timer_data['world']
+        self.world = sys.intern(timer_data['world'])
         self.min_respawn = timer_data['minRespawn']
         self.max_respawn = timer_data['maxRespawn']
         self.last_death = timer_data['lastDeath']
@@ -108,13 +224,64 @@ class HorusHunt:
         self.last_mark = timer_data['lastMark']
 
         # Parse timers
-        self.status = None
-        _time = time.time() * 1000
+        self.status = self.get_status()
+
+    @property
+    def id(self) -> int:
+        return self.mark.id
+
+    @property
+    def name(self) -> str:
+        return self.mark.name
+
+    @property
+    def rank(self) -> str:
+        return self.mark.rank
+
+    @property
+    def image(self) -> str:
+        return self.mark.image
+
+    @property
+    def zone(self) -> str:
+        return self.mark.zone
+
+    @property
+    def region(self) -> str:
+        return self.mark.region
+
+    @property
+    def spawn_trigger(self) -> str:
+        return self.mark.spawn_trigger
+
+    @property
+    def tips(self) -> str:
+        return self.mark.tips
+
+    def get_status(self, _time: typing.Optional[float] = None) -> str:
+        """
+        Get the status of this hunt at the specified time (in milliseconds, defaults to now)
+        """
+        if _time is None:
+            _time = time.time() * 1000
+
         if _time >= self.max_date:
-            self.status = self.STATUS_MAXED
+            return self.STATUS_MAXED
         elif _time >= self.open_date:
-            self.status = self.STATUS_OPENED
+            return self.STATUS_OPENED
         elif self.last_death:
-            self.status = self.STATUS_DIED
-        else:
-            self.status = self.STATUS_CLOSED
+            return self.STATUS_DIED
+
+        return self.STATUS_CLOSED
+
+    def next_transition(self, _time: typing.Optional[float] = None) -> typing.Optional[float]:
+        """
+        Get the time (in milliseconds) of the next open or maxed window transition, if one is pending
+        """
+        if _time is None:
+            _time = time.time() * 1000
+
+        if _time < self.open_date:
+            return self.open_date
+        elif _time < self.max_date:
+            return self.max_date
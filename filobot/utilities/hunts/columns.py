@@ -0,0 +1,67 @@
+import typing
+
+import numpy
+
+
+class WindowColumns:
+    """
+    Array-backed copy of every tracked hunt's world, rank and latest Horus spawn window
+    Finding the next window transition across a datacenter is then a handful of array operations, instead of walking
+    every Hunt and its timer.
+    """
+
+    GROWTH = 1024
+
+    def __init__(self):
+        self._size = 0
+        self._allocate(self.GROWTH)
+
+    def __len__(self):
+        return self._size
+
+    def add(self, world_id: int, rank: str) -> int:
+        """
+        Add a slot for a hunt, returning its index
+        """
+        if self._size == len(self.world_id):
+            self._allocate(len(self.world_id) + self.GROWTH)
+
+        slot = self._size
+        self.world_id[slot] = world_id
+        self.rank[slot] = rank
+        self.open_date[slot] = -numpy.inf
+        self.max_date[slot] = -numpy.inf
+        self._size += 1
+        return slot
+
+    def set_window(self, slot: int, open_date: float, max_date: float) -> None:
+        self.open_date[slot] = open_date
+        self.max_date[slot] = max_date
+
+    def next_transition(self, world_ids: typing.Iterable[int], rank: str, now: float) -> typing.Optional[float]:
+        """
+        Get the earliest pending open or maxed transition of a rank on any of the specified worlds, if there is one
+        Times are in the same unit as the windows, i.e. milliseconds for Horus timers
+        """
+        n = self._size
+        opens = self.open_date[:n]
+        maxes = self.max_date[:n]
+
+        # Same rules as HorusHunt.next_transition, for every slot at once
+        upcoming = numpy.where(now < opens, opens, numpy.where(now < maxes, maxes, numpy.inf))
+        upcoming = upcoming[(self.rank[:n] == rank) & numpy.isin(self.world_id[:n], list(world_ids))]
+
+        when = upcoming.min(initial=numpy.inf)
+        return float(when) if when != numpy.inf else None
+
+    def _allocate(self, capacity: int) -> None:
+        def grow(name: str, dtype) -> numpy.ndarray:
+            column = numpy.zeros(capacity, dtype=dtype)
+            if self._size:
+                column[:self._size] = getattr(self, name)[:self._size]
+            return column
+
+        self.world_id = grow('world_id', numpy.int32)        # type: numpy.ndarray
+        self.rank = grow('rank', 'U1')                       # type: numpy.ndarray
+        self.open_date = grow('open_date', numpy.float64)    # type: numpy.ndarray
+        self.max_date = grow('max_date', numpy.float64)      # type: numpy.ndarray
@@ -1,14 +1,19 @@
 import time
 import typing
 
-# from ...worlds import Worlds
-from huntinfo import HuntInfo
+from filobot.utilities.worlds import Worlds
+from .huntinfo import HuntInfo
+from .status import HuntStatus
 
 # Configuration constants
-FOUND_TO_STALE = float(7200) # Time to consider OPEN as UNKNOWN
+FOUND_TO_STALE = float(7200) # Time to consider FOUND as UNKNOWN
 TIME_TOLERANCE = float(300) # Tolerance time for slightly inaccurate reports
 
+
 class Hunt:
+    __slots__ = ('_world_id', '_hunt_id', '_instance_id', '_status', '_last_updated', '_time_since_previous_update',
+                 '_source', '_coords_x', '_coords_y', '_info', '_emitted', 'timer', 'slot')
+
     def __init__(self, world_id: int, hunt_id: int, instance_id: int):
         # Hunt information
         self._world_id = world_id
@@ -16,20 +21,27 @@ class Hunt:
         self._instance_id = instance_id
 
         # Internal information
-        self._status = 'UNKNOWN'
-        self._last_updated = time.time()
+        self._status = HuntStatus.UNKNOWN
+        self._last_updated = 0.0 # Nothing reported yet, so any report is newer
         self._time_since_previous_update = 0
         self._source = ''
         self._coords_x = 0
         self._coords_y = 0
+        self._emitted = HuntStatus.UNKNOWN # Last status handed out as a transition
 
         # Hunt information
         self._info = HuntInfo.get(hunt_id)
 
+        # Latest Horus timer for this hunt, if any
+        self.timer = None
+
+        # Index in the HuntsManager window columns
+        self.slot = None
+
     # Almost every function must run this
-    def _auto_update_status(self):
+    def _auto_update_status(self, now: typing.Optional[float] = None):
         # Initialize variables
-        delta = self.get_last_updated_since()
+        delta = (now if now is not None else time.time()) - self._last_updated
         status = self._status
         info = self._info
 
@@ -72,7 +84,7 @@ class Hunt:
                 self._status = HuntStatus.OPEN
 
         # If the hunt window is open
-        elif status == HuntStatus.MAYBE_OPEN:
+        elif status == HuntStatus.OPEN:
             if delta > (info.stale_time + TIME_TOLERANCE):
                 # I don't know... are players reporting this?
                 self._status = HuntStatus.UNKNOWN
@@ -82,7 +94,7 @@ class Hunt:
                 self._status = HuntStatus.FORCED
 
         # If the hunt window is forced
-        elif status == HuntStatus.MAYBE_OPEN:
+        elif status == HuntStatus.FORCED:
             if delta > (info.stale_time + TIME_TOLERANCE):
                 # I don't know... are players reporting this?
                 self._status = HuntStatus.UNKNOWN
@@ -95,13 +107,15 @@ class Hunt:
                 self._status = HuntStatus.UNKNOWN
 
         # Just so i know where the function ends...
-        # NOTE: The above could probably be optimized
         return
 
 
     # Basic Informational functions
+    def get_key(self) -> typing.Tuple[int, int, int]:
+        return self._world_id, self._hunt_id, self._instance_id
+
     def get_hunt_id(self) -> int:
-        return self.hunt_id
+        return self._hunt_id
 
     def get_hunt_name(self) -> str:
         return self._info.name
@@ -116,7 +130,7 @@ class Hunt:
         return self._world_id
 
     def get_world(self) -> str:
-        return Worlds.get_world(self._world_id)
+        return Worlds.get_world_by_id(self._world_id)
 
     def get_zone(self) -> str:
         return self._info.zone
@@ -134,7 +148,7 @@ class Hunt:
         return self._coords_x
 
     def get_coords_y(self) -> float:
-        return self._coords_x
+        return self._coords_y
 
     def get_coords_str(self) -> str:
         return f"(X: {str(self._coords_x)}, Y: {str(self._coords_y)})"
@@ -145,9 +159,9 @@ class Hunt:
 
     # Discord helpers
     def discord_message(self) -> str:
-        text = f"self.get_short_call_string"
+        text = self.get_short_call_string()
         if self._status == HuntStatus.DEAD:
-            text = f"~~{text}~~ **Killed** *(after how to do self...)*" # TODO: How long
+            text = f"~~{text}~~ **Killed** *(after {int(self._time_since_previous_update // 60)} minutes)*"
         return text
 
     def embed_title(self) -> str:
@@ -168,13 +182,13 @@ class Hunt:
 
     # Log helpers
     def log_hunt_identification(self) -> str:
-        return f"[{self.get_world()}] {self._get_name()} i{self.get_instance_id()}"
+        return f"[{self.get_world()}] {self.get_name()} i{self.get_instance_id()}"
 
     def __log_hunt_status_change_1(self, old_status, new_status) -> str:
         return f"{old_status} => {new_status}"
 
     def log_text_status_change(self, old_status, new_status) -> str:
-        text = f"{self.log_hunt_identification} Status changed: {self.__log_hunt_status_change_1(old_status, new_status)}"
+        text = f"{self.log_hunt_identification()} Status changed: {self.__log_hunt_status_change_1(old_status, new_status)}"
         if new_status == HuntStatus.FOUND:
             text = f"{text} | {self.get_short_call_string()}"
         return text
@@ -183,34 +197,34 @@ class Hunt:
     # Tracking Informational functions
     def is_open(self) -> bool:
         self._auto_update_status()
-        return True if self._status == HuntStatus.OPEN else False
+        return self._status == HuntStatus.OPEN
 
     def is_maybe_open(self) -> bool: # this function consider open as maybe open
         self._auto_update_status()
-        return True if self._status == HuntStatus.MAYBE_OPEN or self._status == HuntStatus.OPEN else False
+        return self._status == HuntStatus.MAYBE_OPEN or self._status == HuntStatus.OPEN
 
     def is_dead(self) -> bool: # this considers maybe dead as dead
         self._auto_update_status()
-        return True if self._status == HuntStatus.DEAD or self._status == HuntStatus.MAYBE_DEAD else False
+        return self._status == HuntStatus.DEAD or self._status == HuntStatus.MAYBE_DEAD
 
     def is_maybe_dead(self) -> bool:
         self._auto_update_status()
-        return True if self._status == HuntStatus.MAYBE_DEAD else False
+        return self._status == HuntStatus.MAYBE_DEAD
 
     def is_found(self) -> bool:
         self._auto_update_status()
-        return True if self._status == HuntStatus.FOUND else False
+        return self._status == HuntStatus.FOUND
 
     def is_stale(self) -> bool:
         self._auto_update_status()
-        return True if self._status == HuntStatus.UNKNOWN else False
+        return self._status == HuntStatus.UNKNOWN
 
-    def get_status(self) -> str: # -> HuntStatus:
-        self._auto_update_status()
+    def get_status(self, now: typing.Optional[float] = None) -> str: # -> HuntStatus:
+        self._auto_update_status(now)
         return self._status
 
     def get_status_str(self) -> str:
-        status = self._status
+        status = self.get_status()
         if status == HuntStatus.MAYBE_OPEN or status == HuntStatus.OPEN:
             return 'Open' # Hunt can spawn at anytime
         elif status == HuntStatus.FORCED:
@@ -233,16 +247,30 @@ class Hunt:
     def get_last_updated_since(self) -> float:
         return time.time() - self._last_updated
 
+    def pop_transition(self) -> typing.Optional[typing.Tuple[str, str]]:
+        """
+        Return the (old, new) status if it changed since the last call
+        """
+        status = self.get_status()
+        if status == self._emitted:
+            return None
+
+        old, self._emitted = self._emitted, status
+        return old, status
+
 
     # Modifying functions
-    def update_status(self, new_status: str, update_time: float = time.time(), source: str = "", found_x: typing.Optional[float] = None, found_y: typing.Optional[float] = None) -> bool:
-        self._auto_update_status()
+    def update_status(self, new_status: str, update_time: typing.Optional[float] = None, source: str = "", found_x: typing.Optional[float] = None, found_y: typing.Optional[float] = None) -> bool:
+        now = time.time()
+        if update_time is None:
+            update_time = now
+        self._auto_update_status(now)
 
         # Sanity checks
-        if update_time <= (self._update_time - TIME_TOLERANCE):
+        if update_time <= (self._last_updated - TIME_TOLERANCE):
             # Update is in the past
             return False
-        elif update_time > (time.time() + TIME_TOLERANCE):
+        elif update_time > (now + TIME_TOLERANCE):
             # Update is in the future
             return False
 
@@ -262,7 +290,7 @@ class Hunt:
                 update = True
 
         # If hunt is open, maybe open or forced
-        elif old_status == HuntStatus.MAYBE_OPEN or old_status == HuntStatus.OPEN or HuntStatus.FORCED:
+        elif old_status == HuntStatus.MAYBE_OPEN or old_status == HuntStatus.OPEN or old_status == HuntStatus.FORCED:
             # Hunt is found
             if new_status == HuntStatus.FOUND:
                 update = True
@@ -289,7 +317,7 @@ class Hunt:
                 update = True
 
         # If the hunt should be updated
-        if update == True:
+        if update:
             self._status = new_status
             self._time_since_previous_update = update_time - self._last_updated
             self._last_updated = update_time
@@ -299,8 +327,10 @@ class Hunt:
                 self._coords_x = found_x
                 self._coords_y = found_y
 
+            # The report may already be old enough for the window to have moved on
+            self._auto_update_status(now)
+
         # Return if an update was performed
-        # NOTE: The above could probably be optimized
         return update
 
     def force_update_status(self, new_status: str, update_time: float, source: str) -> bool:
@@ -314,3 +344,6 @@ class Hunt:
         self._last_updated = time.time()
         self._source = source
         return True
+
+    def __repr__(self):
+        return f"<Hunt {self.get_name()} on world {self._world_id} i{self._instance_id} ({self._status})>"
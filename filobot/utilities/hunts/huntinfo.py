@@ -1,9 +1,15 @@
+import typing
+
+from filobot.utilities.marks import marks
+
 # Configuration constants
 STALE_MULTIPLIER = 1.5
 STALE_MULTIPLIER_S = 1.0 # S are killed too quick
 
 
 class HuntInfo:
+    __slots__ = ('id', 'name', 'rank', 'expansion', 'zone', 'open_time', 'forced_time', 'stale_time')
+
     def __init__(self, id: int, name: str, rank: str, expansion: str, zone: str, open_time: float, forced_time: float):
         # Hunt information
         self.id = id
@@ -14,16 +20,31 @@ class HuntInfo:
         self.expansion = expansion
         self.zone = zone
 
-        # Window
+        # Window (in seconds since the last kill)
         self.open_time = open_time
         self.forced_time = forced_time
         self.stale_time = forced_time * (STALE_MULTIPLIER_S if rank == 'S' else STALE_MULTIPLIER)
 
+    @staticmethod
+    def get(hunt_id: int) -> 'HuntInfo':
+        return get(hunt_id)
+
+
+_huntinfo = {}  # type: typing.Dict[int, HuntInfo]
+
 
 def get(hunt_id: int) -> HuntInfo:
-    # TODO: well... should be something like _huntinfo[hunt_id]
-    return
+    if not _huntinfo:
+        _init()
+
+    try:
+        return _huntinfo[int(hunt_id)]
+    except (KeyError, ValueError):
+        raise LookupError(f"""ID {hunt_id} does not exist""")
+
 
 def _init():
-    # TODO: Gigantic initialization function
-    return
+    # Spawn windows come from the marks registry in milliseconds
+    for mark in marks:
+        _huntinfo[mark.id] = HuntInfo(mark.id, mark.name, mark.rank, mark.expansion, mark.zone,
+                                      float(mark.min_spawn) / 1000, float(mark.max_spawn) / 1000)
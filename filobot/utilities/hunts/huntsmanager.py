@@ -1,18 +1,124 @@
+import collections
+import logging
+import time
+import typing
+
+from .columns import WindowColumns
+from .hunt import Hunt
+from .status import HuntStatus
+from .util import HuntUtil
+
+# A status change of a single hunt, handed back to the caller to act on
+Transition = collections.namedtuple('Transition', ('key', 'hunt', 'old', 'new'))
+
+
 class HuntsManager:
+    """
+    Tracking engine holding the state of every (world, hunt, instance)
+    Hunts are stored flat, keyed by HuntUtil.getKey tuples, and created on their first report. Every report-applying
+    method returns the resulting Transition (or None); windows elapsing are picked up by the next report's transition.
+    Horus spawn windows are mirrored in WindowColumns, so upcoming transitions are found in one vectorised pass.
+    """
+
     def __init__(self):
-        (some big thing goes here)
+        self._log = logging.getLogger(__name__)
+
+        self._hunts = {}   # type: typing.Dict[typing.Tuple[int, int, int], Hunt]
+        self._worlds = {}  # type: typing.Dict[int, typing.List[Hunt]]
+
+        self._columns = WindowColumns()
+
+    def get(self, key: typing.Tuple[int, int, int]) -> typing.Optional[Hunt]:
+        return self._hunts.get(key)
+
+    def set(self, key: typing.Tuple[int, int, int], hunt: Hunt):
+        old = self._hunts.get(key)
+        if old is not None:
+            self._worlds[key[0]].remove(old)
+
+        self._hunts[key] = hunt
+        self._worlds.setdefault(key[0], []).append(hunt)
+
+        # Reuse the replaced hunt's slot
+        if old is not None:
+            hunt.slot = old.slot
+        else:
+            hunt.slot = self._columns.add(key[0], hunt.get_rank())
+        if hunt.timer is not None:
+            self._columns.set_window(hunt.slot, hunt.timer.open_date, hunt.timer.max_date)
+
+    def get_or_create(self, key: typing.Tuple[int, int, int]) -> Hunt:
+        hunt = self._hunts.get(key)
+        if hunt is None:
+            hunt = Hunt(*key)
+            self.set(key, hunt)
+        return hunt
+
+    def world(self, world_id: int) -> typing.List[Hunt]:
+        """
+        Get every tracked hunt on the specified world
+        """
+        return self._worlds.get(world_id, [])
+
+    def __iter__(self) -> typing.Iterator[Hunt]:
+        return iter(self._hunts.values())
+
+    def __len__(self):
+        return len(self._hunts)
+
+    def update(self, key: typing.Tuple[int, int, int], status: str, update_time: typing.Optional[float] = None,
+               source: str = '', x: typing.Optional[float] = None, y: typing.Optional[float] = None) -> typing.Optional[Transition]:
+        """
+        Apply a status report to a hunt
+        """
+        hunt = self.get_or_create(key)
+        if not hunt.update_status(status, update_time, source, x, y):
+            return None
+
+        return self._transition(hunt)
+
+    def on_find(self, key: typing.Tuple[int, int, int], update_time: float, source: str,
+                x: typing.Optional[float] = None, y: typing.Optional[float] = None) -> typing.Optional[Transition]:
+        return self.update(key, HuntStatus.FOUND, update_time, source, x, y)
+
+    def on_kill(self, key: typing.Tuple[int, int, int], update_time: float, source: str) -> typing.Optional[Transition]:
+        return self.update(key, HuntStatus.DEAD, update_time, source)
+
+    def on_maybe_kill(self, key: typing.Tuple[int, int, int], update_time: float, source: str) -> typing.Optional[Transition]:
+        return self.update(key, HuntStatus.MAYBE_DEAD, update_time, source)
+
+    def apply(self, event) -> typing.Optional[Transition]:
+        """
+        Apply a normalized tracker event (see filobot.utilities.sources.HuntEvent)
+        """
+        key = HuntUtil.getKey(event.world_id, event.hunt_id, event.instance)
+        return self.update(key, event.status, event.reported_at, event.source, event.x, event.y)
+
+    def update_timer(self, key: typing.Tuple[int, int, int], timer) -> typing.Optional[Transition]:
+        """
+        Attach the latest Horus timer to a hunt, applying its last death if it's newer than what we know
+        """
+        hunt = self.get_or_create(key)
+        hunt.timer = timer
+        self._columns.set_window(hunt.slot, timer.open_date, timer.max_date)
 
-    def get(self, key: str) -> Hunt:
-        return
+        if timer.last_death and timer.last_death / 1000 > hunt.get_last_updated():
+            return self.on_kill(key, timer.last_death / 1000, 'horus')
 
-    def set(self, key: str, hunt: Hunt):
-        return
+        return None
 
-    def on_find(self, key: str, update_time: float, source: str):
-        return
+    def next_transition(self, world_ids: typing.Iterable[int], rank: str, now: typing.Optional[float] = None) -> typing.Optional[float]:
+        """
+        Get the time (in milliseconds) of the next Horus window transition of a rank on any of the specified worlds
+        """
+        now = now if now is not None else time.time() * 1000
+        return self._columns.next_transition(world_ids, rank, now)
 
-    def on_kill(self, key: str, update_time: float, source: str):
-        return
+    def _transition(self, hunt: Hunt) -> typing.Optional[Transition]:
+        change = hunt.pop_transition()
+        if change is None:
+            return None
 
-    def on_maybe_kill(self, str: key, update_time: float, source: str):
-        return
+        if self._log.isEnabledFor(logging.DEBUG):
+            self._log.debug(hunt.log_text_status_change(*change))
+        return Transition(hunt.get_key(), hunt, *change)
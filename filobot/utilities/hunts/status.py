@@ -0,0 +1,15 @@
+class HuntStatus:
+    def __init__(self):
+        raise TypeError('HuntStatus is a static class')
+
+    # Nothing reported yet
+    UNKNOWN = 'UNKNOWN' # The bot just started or reports are stale
+    STALE = 'UNKNOWN' # alias of UNKNOWN
+
+    # Hunt status
+    MAYBE_OPEN = 'MAYBE_OPEN'
+    OPEN = 'OPEN'
+    FORCED = 'FORCED'
+    FOUND = 'FOUND'
+    MAYBE_DEAD = 'MAYBE_DEAD' # For untrusted trackers (e.g. Ariyala)
+    DEAD = 'DEAD'
@@ -0,0 +1,19 @@
+import typing
+
+
+class HuntUtil:
+    def __init__(self):
+        raise TypeError('HuntUtil is a static class')
+
+    @staticmethod
+    def getKey(world_id: int, hunt_id: int, instance_id: int) -> typing.Tuple[int, int, int]:
+        return int(world_id), int(hunt_id), int(instance_id) or 1
+
+    @staticmethod
+    def getInfo(key: typing.Tuple[int, int, int]) -> dict:
+        world_id, hunt_id, instance_id = key
+        return {
+            'world_id': world_id,
+            'hunt_id': hunt_id,
+            'instance_id': instance_id,
+        }
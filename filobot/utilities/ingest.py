@@ -0,0 +1,93 @@
+import asyncio
+import logging
+import typing
+
+
+class IngestQueue:
+    """
+    Bounded queue of incoming tracker reports, drained by a pool of workers
+    Reports are queued in batches and acknowledged as soon as they're queued; when the queue can't fit a batch, it is
+    refused so the caller can apply backpressure. The queue size is counted in reports, not batches.
+    """
+
+    QUEUE_SIZE = 1000
+    WORKERS = 4
+
+    def __init__(self, handler: typing.Callable[[typing.List[dict]], typing.Awaitable], size: int = QUEUE_SIZE, workers: int = WORKERS):
+        self._log = logging.getLogger(__name__)
+        self._handler = handler
+        self._size = size
+        self._workers = workers
+
+        self._queue = None  # type: typing.Optional[asyncio.Queue]
+        self._tasks = []
+        self._pending = 0  # Reports queued but not yet processed
+
+        # Metrics
+        self.accepted = 0
+        self.rejected = 0
+        self.processed = 0
+        self.failed = 0
+
+    def start(self) -> None:
+        if self.running:
+            return
+
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.ensure_future(self._worker()) for _ in range(self._workers)]
+
+    @property
+    def running(self) -> bool:
+        return any(not task.done() for task in self._tasks)
+
+    @property
+    def depth(self) -> int:
+        return self._pending
+
+    def put(self, report: dict) -> bool:
+        """
+        Queue a single report for processing, returning False if the queue is full
+        """
+        return self.put_batch([report])
+
+    def put_batch(self, reports: typing.List[dict]) -> bool:
+        """
+        Queue a batch of reports for processing, returning False if the queue can't fit all of them
+        """
+        if self._pending + len(reports) > self._size:
+            self.rejected += len(reports)
+            self._log.warning(f"Ingest queue is full ({self._pending}/{self._size} reports), rejecting {len(reports)} report(s)")
+            return False
+
+        self._pending += len(reports)
+        self._queue.put_nowait(reports)
+        self.accepted += len(reports)
+        return True
+
+    def metrics(self) -> dict:
+        return {
+            'depth'    : self.depth,
+            'batches'  : self._queue.qsize() if self._queue is not None else 0,
+            'size'     : self._size,
+            'workers'  : sum(not task.done() for task in self._tasks),
+            'accepted' : self.accepted,
+            'rejected' : self.rejected,
+            'processed': self.processed,
+            'failed'   : self.failed,
+        }
+
+    async def _worker(self) -> None:
+        while True:
+            reports = await self._queue.get()
+
+            # noinspection PyBroadException
+            try:
+                failed = await self._handler(reports) or 0
+                self.processed += len(reports) - failed
+                self.failed += failed
+            except Exception:
+                self.failed += len(reports)
+                self._log.exception(f"Exception thrown while processing a batch of {len(reports)} report(s)")
+            finally:
+                self._pending -= len(reports)
+                self._queue.task_done()
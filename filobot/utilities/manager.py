@@ -1,18 +1,27 @@
-import json
+import asyncio
+import copy
 import logging
-import os
-import sys
+import time
 import typing
 
 import arrow
 import discord
 from discord.ext.commands import Bot
-from peewee import fn
 
-from filobot.models import KillLog, Subscriptions, SubscriptionsMeta
+from filobot.models import db_executor, KillLog, Notifications, Outbox, Subscriptions, SubscriptionsMeta
 from filobot.utilities import hunt_embed, hunt_simple_embed
 from filobot.utilities.horus import HorusHunt
+from .counters import RelayCounter
+from .dedupe import SightingDeduplicator
+from .dispatcher import Dispatcher
+from .hunts import HuntsManager, HuntStatus, HuntUtil
 from .horus import Horus
+from .marks import marks, ARR_ZONES, HW_ZONES, SB_ZONES, SHB_ZONES
+from .outbox import NotificationOutbox
+from .polling import AdaptivePoller
+from .scheduler import TimerWheel
+from .sources import EventPipeline, HuntEvent
+from .subscriptions import SubscriptionIndex
 from .xivhunt import XivHunt
 from filobot.utilities.worlds import Worlds
 
@@ -28,90 +37,245 @@ class HuntManager:
     SUB_ARR_A   = 'a_realm_reborn_a'
     SUB_ARR_S   = 'a_realm_reborn_s'
 
-    ARR_ZONES = ('Central Shroud', 'East Shroud', 'South Shroud', 'North Shroud', 'Western Thanalan',
-                 'Central Thanalan', 'Eastern Thanalan', 'Southern Thanalan', 'Northern Thanalan', 'Middle La Noscea',
-                 'Lower La Noscea', 'Eastern La Noscea', 'Western La Noscea', 'Upper La Noscea', 'Outer La Noscea',
-                 'Mor Dhona')
+    ARR_ZONES = ARR_ZONES
+    HW_ZONES = HW_ZONES
+    SB_ZONES = SB_ZONES
+    SHB_ZONES = SHB_ZONES
 
-    HW_ZONES = ('Coerthas Central Highlands', 'Coerthas Western Highlands', 'The Dravanian Forelands',
-                'The Dravanian Hinterlands', 'The Churning Mists', 'The Sea of Clouds', 'Azys Lla')
+    # How long hunt found notifications are kept for editing when the hunt dies
+    NOTIFICATION_TTL = 43200
 
-    SB_ZONES = ('The Ruby Sea', 'Yanxia', 'The Azim Steppe', 'The Fringes', 'The Peaks', 'The Lochs')
-
-    SHB_ZONES = ('Il Mheg', "The Rak'tika Greatwood", 'The Tempest', 'Amh Araeng', 'Lakeland', 'Kholusia')
+    # Number of worlds processed concurrently during a recheck
+    RECHECK_CONCURRENCY = 8
 
     COND_DEAD = 'deaths'
     COND_OPEN = 'openings'
     COND_FIND = 'finds'
     CONDITIONS = (COND_DEAD, COND_OPEN, COND_FIND)
 
-    def __init__(self, bot: Bot):
+    def __init__(self, bot: Bot, dedupe_window: float = SightingDeduplicator.WINDOW):
         self._log = logging.getLogger(__name__)
         self.bot = bot
 
         self.xivhunt = XivHunt(bot)
         self.horus = Horus(bot)
 
-        self._subscriptions = list(Subscriptions.select())
-        self._subscriptions_meta = list(SubscriptionsMeta.select())
+        self._subscriptions = []
+        self._subscriptions_meta = []
+
+        # Relay statistics, flushed to the database periodically
+        self.counter = RelayCounter()
+        self.counter.load()
+
+        # Concurrent notification fan-out
+        self.dispatcher = Dispatcher()
+
+        # Notifications are persisted before they're sent so they survive restarts
+        self.outbox = NotificationOutbox(self.dispatcher, self._send_sub_message, self._edit_sub_message)
+        self.outbox.add_handler(Outbox.KIND_FIND, self._on_find_delivered)
+        self.outbox.add_handler(Outbox.KIND_DEATH, self._on_death_delivered)
+
+        # Routing index for dispatching events without querying the database
+        self._index = SubscriptionIndex()
+        self._reload()
+
+        # Tracking engine holding every (world, hunt, instance) state and its latest Horus timer
+        self.hunts = HuntsManager()
 
-        self._marks_info = {}
-        self._load_marks()
+        # Collapses repeated reports of the same hunt
+        self._sightings = SightingDeduplicator(dedupe_window)
 
-        self._hunts = {}
-        self._changed = {}
-        self._found = {}
+        # Normalized events from every registered tracker source
+        self.pipeline = EventPipeline(self.on_event)
+
+        # Fires open / maxed window transitions at their exact time, independent of Horus polling
+        self.scheduler = TimerWheel()
+
+        # Horus polling frequency per datacenter, based on its upcoming S-Rank windows and recent activity
+        self._pollers = {}    # type: typing.Dict[str, AdaptivePoller]
+        self._next_poll = {}  # datacenter -> unix timestamp the datacenter is next due to be polled
+        self._activity = {}   # datacenter -> unix timestamp of the most recent mark, death or sighting
 
         # Callbacks
         self._recheck_cbs = []
 
-        # Logged notifications for editing later
-        self._notifications = {}
+        # Duration of the last recheck cycle, per world and in total (seconds)
+        self.recheck_timings = {}
+        self.recheck_time = 0.0
 
     def get(self, world: str, hunt_name: str, instance=1) -> HorusHunt:
         """
         Get data on the requested hunt
         """
-        _key = f"{hunt_name.lower().strip()}_{instance}"
-        return self._hunts[world]['horus'][_key]
+        try:
+            mark = marks.by_name(hunt_name)
+        except LookupError as e:
+            raise KeyError(str(e))
+
+        hunt = self.hunts.get(HuntUtil.getKey(Worlds.get_world_id(world), mark.id, instance))
+        if hunt is None or hunt.timer is None:
+            raise KeyError(f"""No timer for {hunt_name} on {world} (Instance {instance})""")
+        return hunt.timer
 
     async def recheck(self):
         """
-        Check and update hunt data from XIVHunt and Horus
-        Calls on_change and on_find events respectively
+        Check and update hunt data from Horus, for the datacenters that are due
+        Worlds are processed concurrently, and a failure on one world doesn't affect the others
         """
+        now = time.time()
+        due = [dc for dc in Worlds.get_datacenters() if self._next_poll.get(dc, 0) <= now]
+        if not due:
+            return
+
         # Update Horus
-        await self.horus.update_horus()
-
-        for world in Worlds.get_worlds():
-            if world not in self._hunts:
-                self._hunts[world] = {'horus': {}, 'xivhunt': []}
-
-            self._changed[world] = {}
-            self._found[world] = {}
-
-            # xivhunt = await self.xivhunt.load(world)
-            horus   = await self.horus.load(world)
-
-            # Look for updated Horus entries
-            for key, hunt in horus.items():  # type: str, HorusHunt
-                if key in self._hunts[world]['horus'] and hunt.status != self._hunts[world]['horus'][key].status:
-                    self._log.info(f"""Hunt status for {hunt.name} on {world} (Instance {hunt.instance}) changed - {self._hunts[world]['horus'][key].status.title()} => {hunt.status.title()}""")
-                    self._changed[world][key] = hunt
-                    await self.on_change(world, self._hunts[world]['horus'][key], hunt)
-
-            # Check and see if hunts have been found on XIVHunt
-            # for name, hunt in xivhunt.items():  # type: str, dict
-            #     if name in self._hunts[world]['xivhunt'] and hunt['status'] == 'seen':
-            #         # First time seeing this hunt?
-            #         if self._hunts[world]['xivhunt'][name]['status'] != 'seen':
-            #             self._log.info(f"""Hunt seen for the first time! {name.title()} on {world}""")
-            #             self._found[world][name] = hunt
-            #             await self.on_find(world, name, hunt)
-
-            # self._hunts[world]['xivhunt'] = xivhunt
-            self._hunts[world]['horus'] = horus
-            await self.on_recheck(world, horus)
+        results = {}
+        try:
+            results = await self.horus.update_horus(due)
+        finally:
+            for dc in due:
+                if results.get(dc):
+                    self._poller(dc).success()
+                else:
+                    self._poller(dc).failure()
+                    self._schedule_poll(dc)
+
+        start = time.monotonic()
+        semaphore = asyncio.Semaphore(self.RECHECK_CONCURRENCY)
+        worlds = [world for dc in due if results[dc] for world in Worlds.get_datacenter_worlds(dc)]
+        await asyncio.gather(*[self._recheck_world(world, semaphore) for world in worlds])
+
+        for dc in due:
+            if results[dc]:
+                self._schedule_poll(dc)
+
+        self.recheck_time = time.monotonic() - start
+        if self.recheck_timings:
+            slowest = max(self.recheck_timings, key=self.recheck_timings.get)
+            self._log.debug(f"Recheck completed in {self.recheck_time:.3f}s (slowest world: {slowest}, {self.recheck_timings[slowest]:.3f}s)")
+
+    async def close(self) -> None:
+        """
+        Write out buffered state and release held resources on shutdown
+        """
+        try:
+            await self.counter.flush()
+        finally:
+            await self.horus.close()
+
+    def poll_interval(self) -> float:
+        """
+        Get the number of seconds to wait before the next recheck, i.e. until the next datacenter is due
+        """
+        if not self._next_poll:
+            return AdaptivePoller.MIN_INTERVAL
+        return max(min(self._next_poll.values()) - time.time(), 1.0)
+
+    def _poller(self, datacenter: str) -> AdaptivePoller:
+        if datacenter not in self._pollers:
+            self._pollers[datacenter] = AdaptivePoller()
+        return self._pollers[datacenter]
+
+    def _schedule_poll(self, datacenter: str) -> None:
+        interval = self._poller(datacenter).interval(self._next_window(datacenter), self._activity.get(datacenter, 0.0))
+        self._next_poll[datacenter] = time.time() + interval
+
+    def _next_window(self, datacenter: str) -> typing.Optional[float]:
+        """
+        Get the unix timestamp of the next S-Rank window transition on a datacenter
+        A-Rank windows open and max every few seconds across a datacenter, so they'd keep the poller busy permanently
+        """
+        world_ids = [Worlds.get_world_id(world) for world in Worlds.get_datacenter_worlds(datacenter)]
+        when = self.hunts.next_transition(world_ids, 'S')
+        return when / 1000 if when is not None else None
+
+    def _mark_activity(self, world: str, when: float) -> None:
+        try:
+            datacenter = Worlds.get_world_datacenter(world)
+        except KeyError:
+            return
+        self._activity[datacenter] = max(self._activity.get(datacenter, 0.0), when)
+
+    async def _recheck_world(self, world: str, semaphore: asyncio.Semaphore) -> None:
+        async with semaphore:
+            start = time.monotonic()
+            # noinspection PyBroadException
+            try:
+                await self._process_world(world)
+            except LookupError:
+                # The datacenter this world is on couldn't be fetched
+                self._log.warning(f"No Horus data available for world {world}, skipping")
+            except Exception:
+                self._log.exception(f"Exception thrown while rechecking world {world}")
+            finally:
+                self.recheck_timings[world] = time.monotonic() - start
+
+    async def _process_world(self, world: str) -> None:
+        """
+        Apply changed Horus timers on a world, calling on_change events for timers whose status changed
+        """
+        world_id = Worlds.get_world_id(world)
+
+        # Only timers whose payload changed since the last poll are rebuilt
+        changed = await self.horus.load_changes(world)
+        for hunt in changed.values():  # type: HorusHunt
+            key = HuntUtil.getKey(world_id, hunt.id, hunt.instance)
+            old = self.hunts.get_or_create(key).timer
+            self._mark_activity(world, max(hunt.last_mark or 0, hunt.last_death or 0) / 1000)
+            transition = self.hunts.update_timer(key, hunt)
+            if transition is not None and transition.new == HuntStatus.DEAD:
+                # Horus recorded a kill, so the next report is a new sighting
+                self._sightings.forget(world, hunt.name, hunt.instance)
+            self._schedule_transition(world, key, hunt)
+            if old is not None and hunt.status != old.status:
+                # noinspection PyBroadException
+                try:
+                    await self._status_changed(world, key, old, hunt)
+                except Exception:
+                    self._log.exception(f"Exception thrown while announcing a status change for {hunt.name} on {world}")
+
+        if changed:
+            await self.on_recheck(world, self._timers(world_id))
+
+    def _timers(self, world_id: int) -> typing.Dict[str, HorusHunt]:
+        """
+        Get the Horus timers on a world keyed by "name_instance"
+        """
+        return {f"{h.timer.name.lower()}_{h.timer.instance}": h.timer for h in self.hunts.world(world_id) if h.timer is not None}
+
+    def _schedule_transition(self, world: str, key: tuple, hunt: HorusHunt) -> None:
+        """
+        Schedule the next open / maxed window transition for a hunt, if it has one pending
+        """
+        when = hunt.next_transition()
+        if when is None:
+            self.scheduler.cancel((world, key))
+            return
+
+        self.scheduler.schedule((world, key), when / 1000, lambda: self._on_transition(world, key))
+
+    async def _on_transition(self, world: str, key: tuple) -> None:
+        """
+        Apply a scheduled open / maxed window transition
+        """
+        tracked = self.hunts.get(key)
+        hunt = tracked.timer if tracked is not None else None
+        if hunt is None:
+            return
+
+        status = hunt.get_status()
+        if status == hunt.status:
+            self._schedule_transition(world, key, hunt)
+            return
+
+        new = copy.copy(hunt)
+        new.status = status
+        tracked.timer = new
+        self._schedule_transition(world, key, new)
+        await self._status_changed(world, key, hunt, new)
+
+    async def _status_changed(self, world: str, key: tuple, old: HorusHunt, new: HorusHunt):
+        self._log.info(f"""Hunt status for {new.name} on {world} (Instance {new.instance}) changed - {old.status.title()} => {new.status.title()}""")
+        await self.on_change(world, old, new)
 
     async def on_recheck(self, world: str, horus: HorusHunt):
         for callback in self._recheck_cbs:
@@ -128,29 +292,31 @@ class HuntManager:
         """
         Set channel notifier
         """
-        # Init our channel/world if needed
-        SubscriptionsMeta.delete().where(
-                (SubscriptionsMeta.channel_id == channel)
-                & (SubscriptionsMeta.name == 'notifier')
-        ).execute()
-        SubscriptionsMeta.insert({
-            'channel_id': channel,
-            'name'      : 'notifier',
-            'value'     : role.mention
-        }).execute()
+        def _set_notifier():
+            SubscriptionsMeta.delete().where(
+                    (SubscriptionsMeta.channel_id == channel)
+                    & (SubscriptionsMeta.name == 'notifier')
+            ).execute()
+            SubscriptionsMeta.insert({
+                'channel_id': channel,
+                'name'      : 'notifier',
+                'value'     : role.mention
+            }).execute()
 
-        self._reload()
+        await db_executor.write(_set_notifier)
+
+        self._index.set_meta(channel, 'notifier', role.mention)
 
     async def remove_notifier(self, channel: int) -> None:
         """
         Remove notifier from channel
         """
-        SubscriptionsMeta.delete().where(
+        await db_executor.write(lambda: SubscriptionsMeta.delete().where(
                 (SubscriptionsMeta.channel_id == channel)
                 & (SubscriptionsMeta.name == 'notifier')
-        ).execute()
+        ).execute())
 
-        self._reload()
+        self._index.remove_meta(channel, 'notifier')
 
     async def subscribe(self, channel: int, world: str, subscription: str, conditions: typing.Optional[str] = 'all'):
         """
@@ -186,38 +352,31 @@ class HuntManager:
                 return
 
         # Already subscribed?
-        if Subscriptions.select().where(
-                (Subscriptions.channel_id == channel)
-                & (Subscriptions.world == world)
-                & (Subscriptions.category == sub)
-        ).count():
+        if self._index.is_subscribed(channel, world, sub):
             await self.bot.get_channel(channel).send(
                 "This channel is already subscribed to this feed. If you want unsubscribe, use the unsub command"
             )
             return
 
-        for condition in conditions:
-            Subscriptions.insert({
-                'channel_id': channel,
-                'world'     : world,
-                'category'  : sub,
-                'event'     : condition
-            }).execute()
+        mask = Subscriptions.mask(conditions)
+        await db_executor.write(lambda: Subscriptions.insert({
+            'channel_id': channel,
+            'world'     : world,
+            'category'  : sub,
+            'conditions': mask
+        }).execute())
+        self._index.set(channel, world, sub, mask)
 
         await self.bot.get_channel(channel).send(f"""Subscribed channel to {str(sub).replace('_', ' ').title()}-Rank hunts on {world}""")
-        self._reload()
 
     async def subscribe_all(self, datacenter: str, channel: int, subscription: str, conditions: typing.Optional[str] = 'all'):
         """
         Subscribe a channel to hunt events on all worlds
+        Multiple datacenters and categories may be given separated by commas, and are subscribed in a single transaction
         """
-        # Validate subscription channel
-        try:
-            sub = getattr(self, f"""SUB_{subscription.upper()}""")
-        except AttributeError:
-            await self.bot.get_channel(channel).send(
-                "Invalid subscription provided, valid subscriptions are: sb_a, sb_s, hw_a, hw_s, arr_a, arr_s"
-            )
+        # Validate subscription channels
+        subs = await self._parse_categories(channel, subscription)
+        if subs is None:
             return
 
         # Validate conditions
@@ -232,239 +391,361 @@ class HuntManager:
                 )
                 return
 
-        # Validate datacenter
-        datacenter = datacenter.strip().lower().title()
-        if datacenter not in Worlds.get_datacenters():
+        # Validate datacenters
+        datacenters = [dc.strip().lower().title() for dc in datacenter.split(',') if dc.strip()]
+        _invalid_datacenters = set(datacenters) - set(Worlds.get_datacenters())
+        if not datacenters or _invalid_datacenters:
             await self.bot.get_channel(channel).send(f"Invalid datacenter provided, valid datacenters are: {', '.join(Worlds.get_datacenters())}")
             return
 
-        for world in Worlds.get_datacenter_worlds(datacenter):
+        # One datacenter-wide entry per datacenter and category, replacing any per-world subscriptions it covers
+        mask = Subscriptions.mask(conditions)
+        covered = datacenters + [world for dc in datacenters for world in Worlds.get_datacenter_worlds(dc)]
+        routes = [(dc, sub, mask) for dc in datacenters for sub in subs]
+
+        def _subscribe_all():
             # Already subscribed? Overwrite it
             Subscriptions.delete().where(
                     (Subscriptions.channel_id == channel)
-                    & (Subscriptions.world == world)
-                    & (Subscriptions.category == sub)
-            )
+                    & (Subscriptions.world.in_(covered))
+                    & (Subscriptions.category.in_(subs))
+            ).execute()
 
-            for condition in conditions:
-                Subscriptions.insert({
-                    'channel_id': channel,
-                    'world'     : world,
-                    'category'  : sub,
-                    'event'     : condition
-                }).execute()
+            Subscriptions.insert_many([{
+                'channel_id': channel,
+                'world'     : dc,
+                'datacenter': True,
+                'category'  : sub,
+                'conditions': mask
+            } for dc, sub, mask in routes]).execute()
+
+        await db_executor.write(_subscribe_all)
+        self._index.replace(channel, covered, subs, routes)
 
         await self.bot.get_channel(channel).send(
-            f"""Subscribed channel to {str(sub).replace('_', ' ').title()}-Rank hunts on **all worlds**"""
+            f"""Subscribed channel to {self._describe_categories(subs)}-Rank hunts on **all worlds** of {', '.join(datacenters)}"""
         )
-        self._reload()
 
     async def unsubscribe(self, channel: int, world: str, subscription: str):
         """
         Unsubscribe a channel from hunt events
-        """
-        world = world.strip().lower().title()
-        if world not in Worlds.get_worlds():
+        Multiple worlds (or whole datacenters) and categories may be given separated by commas
+        """
+        names = [w.strip().lower().title() for w in world.split(',') if w.strip()]
+        worlds = []
+        for name in names:
+            if Worlds.is_datacenter(name):
+                worlds.extend(Worlds.get_datacenter_worlds(name))
+            elif name in Worlds.get_worlds():
+                worlds.append(name)
+            else:
+                worlds = []
+                break
+
+        if not worlds:
             await self.bot.get_channel(channel).send(
                 "No world by that name found - please check your spelling and try again"
             )
             return
 
-        try:
-            sub = getattr(self, f"""SUB_{subscription.upper()}""")
-        except AttributeError:
+        subs = await self._parse_categories(channel, subscription)
+        if subs is None:
+            return
+
+        removed = set(worlds) | {name for name in names if Worlds.is_datacenter(name)}
+
+        def _unsubscribe():
+            Subscriptions.delete().where(
+                    (Subscriptions.channel_id == channel)
+                    & (Subscriptions.world.in_(removed))
+                    & (Subscriptions.category.in_(subs))
+            ).execute()
+
+            # Datacenter-wide subscriptions only lose the worlds being unsubscribed, so split them into per-world entries
+            split, rows = set(), []
+            for sub in Subscriptions.select().where(
+                    (Subscriptions.channel_id == channel)
+                    & (Subscriptions.datacenter == True)
+                    & (Subscriptions.category.in_(subs))
+            ):
+                dc_worlds = Worlds.get_datacenter_worlds(sub.world)
+                if removed.isdisjoint(dc_worlds):
+                    continue
+
+                split.add(sub.world)
+                sub.delete_instance()
+                rows.extend({
+                    'channel_id': channel,
+                    'world'     : world,
+                    'category'  : sub.category,
+                    'conditions': sub.conditions
+                } for world in dc_worlds if world not in removed)
+
+            if rows:
+                Subscriptions.insert_many(rows).execute()
+            return split, rows
+
+        split, rows = await db_executor.write(_unsubscribe)
+        self._index.replace(channel, removed | split, subs, [(r['world'], r['category'], r['conditions']) for r in rows])
+
+        await self.bot.get_channel(channel).send(f"""Unsubscribed channel from {self._describe_categories(subs)}-Rank hunts on {', '.join(names)}""")
+
+    async def _parse_categories(self, channel: int, subscription: str) -> typing.Optional[typing.List[str]]:
+        """
+        Parse a comma separated list of subscription categories, sending an error to the channel if any are invalid
+        """
+        subs = []
+        for name in (n.strip().upper() for n in subscription.split(',') if n.strip()):
+            sub = getattr(self, f"""SUB_{name}""", None)
+            if sub is None:
+                subs = []
+                break
+            if sub not in subs:
+                subs.append(sub)
+
+        if not subs:
             await self.bot.get_channel(channel).send(
-                "Invalid subscription provided, valid subscriptions are: sb_a, sb_s, hw_a, hw_s, arr_a, arr_s"
+                "Invalid subscription provided, valid subscriptions are: shb_a, shb_s, sb_a, sb_s, hw_a, hw_s, arr_a, arr_s"
             )
-            return
+            return None
 
-        Subscriptions.delete().where(
-                (Subscriptions.channel_id == channel)
-                & (Subscriptions.world == world)
-                & (Subscriptions.category == sub)
-        ).execute()
+        return subs
 
-        await self.bot.get_channel(channel).send(f"""Unsubscribed channel from {str(sub).replace('_', ' ').title()}-Rank hunts on {world}""")
-        self._reload()
+    @staticmethod
+    def _describe_categories(subs: typing.List[str]) -> str:
+        return ', '.join(str(sub).replace('_', ' ').title() for sub in subs)
 
     async def get_subscriptions(self, channel: int) -> typing.List[Subscriptions]:
         """
         Get all subscriptions for the specified channel
         """
-        return list(Subscriptions.select().where(Subscriptions.channel_id == channel))
+        return await db_executor.read(lambda: list(Subscriptions.select().where(Subscriptions.channel_id == channel)))
 
     async def clear_subscriptions(self, channel: int) -> None:
         """
         Clear all subscriptions for the specified channel
         """
-        Subscriptions.delete().where(Subscriptions.channel_id == channel).execute()
-        self._reload()
+        await db_executor.write(lambda: Subscriptions.delete().where(Subscriptions.channel_id == channel).execute())
+        self._index.remove_channel(channel)
 
     async def count(self) -> typing.Tuple[int, int]:
         """
         Return the total number of A-Ranks and S-Ranks relayed by Filo
         """
-        a_count = list(SubscriptionsMeta.select(fn.SUM(SubscriptionsMeta.value).alias('total')).where(SubscriptionsMeta.name == 'a_count'))[0].total or 0
-        s_count = list(SubscriptionsMeta.select(fn.SUM(SubscriptionsMeta.value).alias('total')).where(SubscriptionsMeta.name == 's_count'))[0].total or 0
-
-        return (a_count, s_count)
+        return self.counter.totals()
 
     async def on_change(self, world: str, old: HorusHunt, new: HorusHunt):
         """
         Hunt status change event handler
         """
-        hunt = self._marks_info[old.name.lower()]
-        subs = Subscriptions.select().where(
-                (Subscriptions.world == world)
-                & (Subscriptions.category == hunt['Channel'])
-        )
+        hunt = marks.by_name(old.name)
         embed = hunt_simple_embed(new.name, new)
 
-        for sub in subs:  # type: Subscriptions
-            if new.status == new.STATUS_OPENED and self.COND_OPEN == sub.event:
-                await self._send_sub_message(f"A hunt has opened on **{world}** (**Instance {new.instance}**)!", embed, sub)
-                break
+        if new.status in (new.STATUS_OPENED, new.STATUS_MAXED):
+            if new.status == new.STATUS_OPENED:
+                content = f"A hunt has opened on **{world}** (**Instance {new.instance}**)!"
+            else:
+                content = f"A hunts maximum spawn window has been reached on **{world}** (**Instance {new.instance}**)!"
 
-            if new.status == new.STATUS_MAXED and self.COND_OPEN == sub.event:
-                await self._send_sub_message(f"A hunts maximum spawn window has been reached on **{world}** (**Instance {new.instance}**)!", embed, sub)
-                break
+            channels = self._index.get(world, hunt.channel, Subscriptions.COND_OPEN)
+            await self.outbox.post(
+                    f"{new.status}:{world}:{new.name.lower()}:{new.instance}:{new.open_date}", Outbox.KIND_OPEN,
+                    world, new.name, new.instance, hunt.rank, embed, {channel: content for channel in channels}
+            )
 
-            if new.status == new.STATUS_DIED and self.COND_DEAD == sub.event:
-                # If we previously sent a notification that the hunt was found, edit that message instead of
-                # sending a new one
-                notification = await self.get_notification(sub.channel_id, world, new.name, new.instance)
-                if notification:
-                    notification, log = notification
-                    found   = int(notification.created_at.timestamp())
-                    killed  = arrow.get(int(new.last_mark / 1000)).timestamp
-                    seconds = killed - log.found
-
-                    kill_time = []
-                    if seconds > 120:
-                        kill_time.append(f"""{int(seconds / 60)} minutes""")
-                        seconds -= int(seconds / 60) * 60
-                    elif seconds > 60:
-                        kill_time.append(f"""1 minute""")
-                        seconds -= 60
-                    kill_time.append(f"""{int(seconds)} seconds""")
-
-                    log.killed = killed
-                    log.kill_time = seconds
+        if new.status == new.STATUS_DIED:
+            # If we previously sent a notification that the hunt was found, edit that message instead of sending a new
+            # one. Edits go through the outbox, so they're retried and survive restarts like any other notification
+            channels = self._index.get(world, hunt.channel, Subscriptions.COND_DEAD)
+            notifications = await self.get_notifications(channels, world, new.name, new.instance)
+            killed = arrow.get(int(new.last_mark / 1000)).timestamp
+
+            edits = {}  # original content -> {channel: (edited content, message ID)}
+            for channel, (notification, log) in notifications.items():
+                seconds = killed - log.found
+
+                kill_time = []
+                if seconds > 120:
+                    kill_time.append(f"""{int(seconds / 60)} minutes""")
+                    seconds -= int(seconds / 60) * 60
+                elif seconds > 60:
+                    kill_time.append(f"""1 minute""")
+                    seconds -= 60
+                kill_time.append(f"""{int(seconds)} seconds""")
+
+                log.killed = killed
+                log.kill_time = seconds
+
+                # Remove the ping mention
+                content = notification.content
+                content = content[content.find(f"[{new.world}]"):]
+
+                # Add dead timing to message
+                edits.setdefault(content, {})[channel] = (f"~~{content}~~ **Killed** *(after {', '.join(kill_time)})*", notification.message_id)
+
+            def _log_kills():
+                for notification, log in notifications.values():
                     log.save()
 
-                    try:
-                        # Get the original content
-                        content = notification.content
+            if notifications:
+                await db_executor.write(_log_kills)
+
+            # The embed description is the original content, so channels are grouped by it
+            for content, edited in edits.items():
+                _embed = embed.copy()
+                _embed.description = f"~~{content}~~"
+                await self.outbox.post(
+                        f"death:{world}:{new.name.lower()}:{new.instance}:{new.last_death}", Outbox.KIND_DEATH,
+                        world, new.name, new.instance, hunt.rank, _embed,
+                        {channel: c for channel, (c, _) in edited.items()}, {channel: m for channel, (_, m) in edited.items()}
+                )
 
-                        # Remove the ping mention
-                        beg = content.find(f"[{new.world}]")
-                        content = content[beg:]
+        # Once the hunt has died, the next report is a new sighting
+        if new.status == new.STATUS_DIED:
+            self._sightings.forget(world, new.name, new.instance)
 
-                        # Set embed description
-                        embed.description = f"~~{content}~~"
+    async def on_event(self, event: HuntEvent):
+        """
+        Tracker event handler
+        """
+        world = self.get_world(event.world_id)
+        hunt = marks.by_id(event.hunt_id)
+        key = HuntUtil.getKey(event.world_id, event.hunt_id, event.instance)
+        transition = self.hunts.apply(event)
+        self._mark_activity(world, time.time())
 
-                        # Add dead timing to message
-                        content = f"~~{content}~~ **Killed** *(after {', '.join(kill_time)})*"
+        # A hunt can't respawn before its window opens, so a find reported after its death is stale
+        if event.status == HuntEvent.STATUS_FOUND and transition is None and self.hunts.get(key).get_status() == HuntStatus.DEAD:
+            self._log.info(f"Ignoring report of {hunt.name} on {world} (Instance {event.instance}), which is dead until its window opens")
+            return
 
-                        # Edit the message
-                        await notification.edit(content=content, embed=embed)
-                    except discord.NotFound:
-                        self._log.warning(f"Notification message for hunt {new.name} on world {world} has been deleted")
+        if event.status != HuntEvent.STATUS_FOUND:
+            # Deaths are announced from Horus; a confirmed kill just means the next sighting is a new one
+            if transition is not None and transition.new == HuntStatus.DEAD:
+                self._sightings.forget(world, hunt.name, event.instance)
+            return
 
-            _key = f"{new.name.strip().lower()}_{new.instance}"
-            if _key in self._hunts[world]['xivhunt']:
-                self._hunts[world]['xivhunt'].remove(_key)
+        xivhunt = {
+            'rank': hunt.rank,
+            'i': event.instance,
+            'status': 'seen',
+            'last_seen': int(event.reported_at),
+            'coords': event.coords,
+            'world': world,
+        }
+        await self.on_find(world, hunt.name, xivhunt, event.instance)
 
     async def on_find(self, world: str, name: str, xivhunt: dict, instance=1):
         """
         Hunt found event handler
         """
-        if world not in self._hunts:
-            self._hunts[world] = {'horus': {}, 'xivhunt': []}
-
-        _key = f"{name.strip().lower()}_{instance}"
-        if _key in self._hunts[world]['xivhunt']:
+        if not self._sightings.check(world, name, instance, xivhunt['coords']):
             self._log.debug(f"Hunt {name} on instance {instance} already logged")
             return
 
-        hunt = self._marks_info[name.lower()]
-        if hunt['Rank'] not in ('A', 'S'):
-            self._log.debug(f"""Ignoring notifications for {hunt['Rank']} rank hunts""")
+        hunt = marks.by_name(name)
+        if hunt.rank not in ('A', 'S'):
+            self._log.debug(f"""Ignoring notifications for {hunt.rank} rank hunts""")
             return
 
         self._log.info(f"A hunt has been found on world {world} (Instance {instance}) :: {name}, Rank {xivhunt['rank']}")
 
-        subs = Subscriptions.select().where(
-                (Subscriptions.world == world)
-                & (Subscriptions.category == hunt['Channel'])
-        )
+        # content = f"""**{world}** {hunt['Rank']} Rank: **{hunt['Name']}** @ {hunt['ZoneName']} ({xivhunt['coords']}) i{instance}"""
+        description = f"""[{world}] {hunt.zone} ({xivhunt['coords']}) i{instance}"""
         embed = hunt_simple_embed(name, xivhunt=xivhunt)
+        embed.description = description
 
-        for sub in subs:  # type: Subscriptions
-            if self.COND_FIND != sub.event:
-                continue
-
-            _meta = SubscriptionsMeta.select().where(SubscriptionsMeta.channel_id == sub.channel_id)
-            meta  = {m.name : m.value for m in _meta}
+        contents = {}
+        for channel in self._index.get(world, hunt.channel, Subscriptions.COND_FIND):
+            meta = self._index.meta(channel)
             role_mention = meta['notifier'] if 'notifier' in meta else None
 
-            # content = f"""**{world}** {hunt['Rank']} Rank: **{hunt['Name']}** @ {hunt['ZoneName']} ({xivhunt['coords']}) i{instance}"""
-            content = f"""[{world}] {hunt['ZoneName']} ({xivhunt['coords']}) i{instance}"""
-            embed.description = content
+            content = description
             if role_mention:
                 content = f"""{role_mention} {content}"""
+            contents[channel] = content
 
-            message = await self._send_sub_message(content, embed, sub)
-            if not message:
-                continue
+        await self.outbox.post(
+                f"find:{world}:{name.lower()}:{instance}:{xivhunt['last_seen']}", Outbox.KIND_FIND,
+                world, name, instance, hunt.rank, embed, contents
+        )
 
-            await self.log_notification(message, sub.channel_id, world, name, instance)
+    async def _on_find_delivered(self, entry: Outbox, message: discord.Message) -> None:
+        """
+        Log a delivered hunt found notification and update the channels relay counter
+        """
+        channel = entry.channel_id
+        await self.log_notification(message, channel, entry.world, entry.hunt_name, entry.instance)
 
-            # Relay counter
-            _counter_key = f"""{hunt['Rank'].lower()}_count"""
-            if _counter_key not in meta:
-                SubscriptionsMeta.insert({
-                    'channel_id'    : sub.channel_id,
-                    'name'          : _counter_key,
-                    'value'         : 1
-                }).execute()
-            else:
-                SubscriptionsMeta.update({
-                    'value'         : int(meta[_counter_key]) + 1
-                }).where(
-                    (SubscriptionsMeta.channel_id == sub.channel_id)
-                    & (SubscriptionsMeta.name == _counter_key)
-                ).execute()
+        # Relay counter
+        self.counter.increment(channel, entry.rank)
 
-        self._hunts[world]['xivhunt'].append(_key)
+    async def _on_death_delivered(self, entry: Outbox, message: dict) -> None:
+        """
+        Forget a found notification once it's been edited to mark the hunt as killed
+        """
+        await self.remove_notification(entry.channel_id, entry.message_id)
 
     async def log_notification(self, message: discord.Message, channel: int, world: str, hunt_name: str, instance : int = 1) -> None:
         """
         Log a hunt found notification for editing later
         """
-        key = f"{hunt_name.lower()}_{instance}"
-        if channel not in self._notifications:
-            self._notifications[channel] = {}
-        if world not in self._notifications[channel]:
-            self._notifications[channel][world] = {}
+        now = arrow.utcnow().timestamp
 
-        log = KillLog.create(hunt_name=hunt_name.lower(), world=world, found=arrow.utcnow().timestamp)
-        self._notifications[channel][world][key] = (message, log)
+        def _log_notification():
+            log = KillLog.create(hunt_name=hunt_name.lower(), world=world, found=now)
+            Notifications.insert({
+                'channel_id': channel,
+                'world'     : world,
+                'hunt_name' : hunt_name.lower(),
+                'instance'  : instance,
+                'message_id': message.id,
+                'content'   : message.content,
+                'kill_log'  : log,
+                'created'   : now
+            }).on_conflict_replace().execute()
+
+        await db_executor.write(_log_notification)
         self._log.debug("Notification message logged: " + repr(message))
 
-    async def get_notification(self, channel: int, world: str, hunt_name: str, instance : int = 1) -> typing.Optional[typing.Tuple[discord.Message, KillLog]]:
+    async def get_notifications(self, channels: typing.List[int], world: str, hunt_name: str,
+                                instance : int = 1) -> typing.Dict[int, typing.Tuple[Notifications, KillLog]]:
         """
-        Attempt to retrieve a notification message for a previously located hunt
-        NOTE: Notifications are automatically purged after retrieved using this method
+        Attempt to retrieve the notification messages for a previously located hunt, keyed by channel
+        NOTE: Notifications are kept until removed with remove_notification, i.e. once the message has been edited
         """
-        key = f"{hunt_name.lower()}_{instance}"
-        if channel not in self._notifications or world not in self._notifications[channel]:
-            return None
+        if not channels:
+            return {}
+
+        def _get_notifications():
+            return {n.channel_id: (n, n.kill_log) for n in Notifications.select(Notifications, KillLog).join(KillLog).where(
+                    (Notifications.channel_id.in_(channels))
+                    & (Notifications.world == world)
+                    & (Notifications.hunt_name == hunt_name.lower())
+                    & (Notifications.instance == instance)
+                    & (Notifications.created >= arrow.utcnow().timestamp - self.NOTIFICATION_TTL)
+            )}
 
-        if key in self._notifications[channel][world]:
-            message, log = self._notifications[channel][world][key]
-            del self._notifications[channel][world][key]
-            return message, log
+        return await db_executor.read(_get_notifications)
+
+    async def remove_notification(self, channel: int, message_id: int) -> None:
+        """
+        Remove a logged notification message
+        """
+        await db_executor.write(lambda: Notifications.delete().where(
+                (Notifications.channel_id == channel)
+                & (Notifications.message_id == message_id)
+        ).execute())
+
+    async def purge_notifications(self) -> None:
+        """
+        Evict logged notifications older than NOTIFICATION_TTL
+        """
+        count = await db_executor.write(
+                lambda: Notifications.delete().where(Notifications.created < arrow.utcnow().timestamp - self.NOTIFICATION_TTL).execute()
+        )
+        if count:
+            self._log.info(f"Purged {count} expired hunt notifications")
 
     def get_world(self, id: int):
         try:
@@ -472,44 +753,36 @@ class HuntManager:
         except:
             raise IndexError(f'No world with the ID {id} could be found')
 
-    async def _send_sub_message(self, message, embed: discord.Embed, sub: Subscriptions) -> typing.Optional[discord.Message]:
+    async def _send_sub_message(self, message, embed: discord.Embed, channel: int, nonce: typing.Optional[str] = None) -> typing.Optional[discord.Message]:
         """
         Attempt to send a subscription message
         """
         try:
-            return await self.bot.get_channel(sub.channel_id).send(message, embed=embed)
+            return await self.bot.get_channel(channel).send(message, embed=embed, nonce=nonce)
         except AttributeError:
-            self._log.warning(f"Subscription channel is no longer active; removing channel {sub.channel_id}")
-            Subscriptions.delete().where(Subscriptions.channel_id == sub.channel_id).execute()
+            self._log.warning(f"Subscription channel is no longer active; removing channel {channel}")
+            await db_executor.write(lambda: Subscriptions.delete().where(Subscriptions.channel_id == channel).execute())
+            self._index.remove_channel(channel)
+        except discord.errors.Forbidden:
+            self._log.warning(f"No permission to send to channel {channel}")
+
+    async def _edit_sub_message(self, message, embed: discord.Embed, channel: int, message_id: int) -> typing.Optional[dict]:
+        """
+        Attempt to edit a previously sent subscription message by ID, without fetching it first
+        """
+        try:
+            return await self.bot.http.edit_message(channel, message_id, content=message, embed=embed.to_dict())
+        except discord.NotFound:
+            self._log.warning(f"Notification message {message_id} in channel {channel} has been deleted")
+            await self.remove_notification(channel, message_id)
         except discord.errors.Forbidden:
-            self._log.warning(f"No permission to send to channel {sub.channel_id}")
+            self._log.warning(f"No permission to edit messages in channel {channel}")
 
     def _reload(self):
         """
-        Save configuration changes
+        Reload subscriptions from the database and rebuild the routing index
+        Only called on startup, before the event loop is running, so the database is queried directly
         """
         self._subscriptions = list(Subscriptions.select())
         self._subscriptions_meta = list(SubscriptionsMeta.select())
-
-    def _load_marks(self):
-        with open(os.path.dirname(os.path.realpath(sys.argv[0])) + os.sep + os.path.join('data', 'marks_info.json')) as json_file:
-            marks = json.load(json_file)
-
-            for _id, mark in marks.items():
-                key = mark['Name'].lower()
-                self._marks_info[key] = mark
-
-                if mark['ZoneName'] in self.ARR_ZONES and (mark['Rank'] == 'A' or mark['Rank'] == 'S'):
-                    channel = getattr(self, f"""SUB_ARR_{mark['Rank']}""")
-                    self._marks_info[key]['Channel'] = channel
-                elif mark['ZoneName'] in self.HW_ZONES and (mark['Rank'] == 'A' or mark['Rank'] == 'S'):
-                    channel = getattr(self, f"""SUB_HW_{mark['Rank']}""")
-                    self._marks_info[key]['Channel'] = channel
-                elif mark['ZoneName'] in self.SB_ZONES and (mark['Rank'] == 'A' or mark['Rank'] == 'S'):
-                    channel = getattr(self, f"""SUB_SB_{mark['Rank']}""")
-                    self._marks_info[key]['Channel'] = channel
-                elif mark['ZoneName'] in self.SHB_ZONES and (mark['Rank'] == 'A' or mark['Rank'] == 'S'):
-                    channel = getattr(self, f"""SUB_SHB_{mark['Rank']}""")
-                    self._marks_info[key]['Channel'] = channel
-                else:
-                    self._log.info(f"""Not binding hunt {mark['Name']} to a subscription channel""")
+        self._index.rebuild(self._subscriptions, self._subscriptions_meta)
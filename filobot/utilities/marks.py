@@ -0,0 +1,130 @@
+import json
+import os
+import sys
+import typing
+
+ARR_ZONES = ('Central Shroud', 'East Shroud', 'South Shroud', 'North Shroud', 'Western Thanalan',
+             'Central Thanalan', 'Eastern Thanalan', 'Southern Thanalan', 'Northern Thanalan', 'Middle La Noscea',
+             'Lower La Noscea', 'Eastern La Noscea', 'Western La Noscea', 'Upper La Noscea', 'Outer La Noscea',
+             'Mor Dhona')
+
+HW_ZONES = ('Coerthas Central Highlands', 'Coerthas Western Highlands', 'The Dravanian Forelands',
+            'The Dravanian Hinterlands', 'The Churning Mists', 'The Sea of Clouds', 'Azys Lla')
+
+SB_ZONES = ('The Ruby Sea', 'Yanxia', 'The Azim Steppe', 'The Fringes', 'The Peaks', 'The Lochs')
+
+SHB_ZONES = ('Il Mheg', "The Rak'tika Greatwood", 'The Tempest', 'Amh Araeng', 'Lakeland', 'Kholusia')
+
+EXPANSIONS = (
+    ('a_realm_reborn', ARR_ZONES),
+    ('heavensward', HW_ZONES),
+    ('stormblood', SB_ZONES),
+    ('shadowbringers', SHB_ZONES),
+)
+
+# Shortened hunt names
+ALIASES = {
+    'aqra': 'aqrabuamelu',
+    'voch': 'vochstein',
+    'lumi': 'luminare',
+    'mahi': 'mahisha',
+    'funa': 'funa yurei',
+    'oni' : 'oni yumemi',
+    'anga': 'angada',
+    'gaja': 'gajasura',
+    'giri': 'girimekhala',
+}
+
+
+def normalize(name: str) -> str:
+    return name.strip().lower()
+
+
+class Mark:
+    """
+    Immutable hunt mark record
+    """
+
+    __slots__ = ('id', 'name', 'rank', 'image', 'zone_id', 'zone', 'region_id', 'region', 'spawn_trigger', 'tips',
+                 'min_spawn', 'max_spawn', 'expansion', 'channel')
+
+    def __init__(self, data: dict):
+        expansion = None
+        for _expansion, zones in EXPANSIONS:
+            if data['ZoneName'] in zones:
+                expansion = _expansion
+                break
+
+        _set = super().__setattr__
+        _set('id', int(data['ID']))
+        _set('name', data['Name'])
+        _set('rank', data['Rank'])
+        _set('image', data['Image'])
+        _set('zone_id', data['ZoneID'])
+        _set('zone', data['ZoneName'])
+        _set('region_id', data['RegionId'])
+        _set('region', data['RegionName'])
+        _set('spawn_trigger', data['SpawnTrigger'])
+        _set('tips', data['Tips'])
+        _set('min_spawn', data['MinSpawn'])
+        _set('max_spawn', data['MaxSpawn'])
+        _set('expansion', expansion)
+
+        # Subscription category (only A and S ranks can be subscribed to)
+        _set('channel', f"{expansion}_{data['Rank'].lower()}" if expansion and data['Rank'] in ('A', 'S') else None)
+
+    def __setattr__(self, key, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __repr__(self):
+        return f"<Mark {self.id} {self.name} ({self.rank})>"
+
+
+class MarkRegistry:
+    """
+    Hunt marks indexed by ID, normalized name and alias
+    """
+
+    def __init__(self, marks: typing.Iterable[Mark], aliases: typing.Dict[str, str]):
+        self._by_id = {}
+        self._by_name = {}
+        for mark in marks:
+            self._by_id[mark.id] = mark
+            self._by_name[normalize(mark.name)] = mark
+
+        self._by_alias = {normalize(alias): self._by_name[normalize(name)] for alias, name in aliases.items()}
+
+    @classmethod
+    def load(cls, path: str):
+        with open(path) as json_file:
+            data = json.load(json_file)
+
+        return cls([Mark(mark) for mark in data.values()], ALIASES)
+
+    def by_id(self, id) -> Mark:
+        try:
+            return self._by_id[int(id)]
+        except (KeyError, ValueError):
+            raise LookupError(f"""ID {id} does not exist""")
+
+    def by_name(self, name: str) -> Mark:
+        try:
+            return self._by_name[normalize(name)]
+        except KeyError:
+            raise LookupError(f"""No hunt named {name} exists""")
+
+    def find(self, name: str) -> typing.Optional[Mark]:
+        """
+        Find a mark by its name or alias
+        """
+        name = normalize(name)
+        return self._by_name.get(name) or self._by_alias.get(name)
+
+    def __iter__(self) -> typing.Iterator[Mark]:
+        return iter(self._by_id.values())
+
+    def __len__(self):
+        return len(self._by_id)
+
+
+marks = MarkRegistry.load(os.path.dirname(os.path.realpath(sys.argv[0])) + os.sep + os.path.join('data', 'marks_info.json'))
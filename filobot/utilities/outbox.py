@@ -0,0 +1,207 @@
+import asyncio
+import json
+import logging
+import typing
+
+import arrow
+import discord
+
+from filobot.models import db_executor, Outbox
+from filobot.utilities.dispatcher import Dispatcher
+
+
+class NotificationOutbox:
+    """
+    Durable notification outbox
+    Notifications are written to the Outbox table before they're sent, then delivered through the dispatcher.
+    Failed sends are retried with exponential backoff, and anything left undelivered when the bot stopped is resumed
+    on startup. Edits of previously sent messages (Outbox.KIND_DEATH) go through the same path, by message ID.
+    """
+
+    MAX_ATTEMPTS = 5
+    BACKOFF_BASE = 5        # Seconds before the first retry, doubled on every attempt
+    RETRY_INTERVAL = 5.0    # How often to look for notifications due a retry
+    CLAIM_TIMEOUT = 60      # Seconds a claimed notification is left alone before it's considered abandoned
+    MAX_AGE = 900           # Hunt calls older than this aren't worth delivering anymore
+    PURGE_AGE = 86400       # Delivered / failed notifications are kept this long
+
+    EDIT_KINDS = (Outbox.KIND_DEATH,)
+
+    def __init__(self, dispatcher: Dispatcher,
+                 send: typing.Callable[[str, discord.Embed, int, typing.Optional[str]], typing.Awaitable[typing.Optional[discord.Message]]],
+                 edit: typing.Callable[[str, discord.Embed, int, int], typing.Awaitable[typing.Optional[dict]]]):
+        self._log = logging.getLogger(__name__)
+        self._dispatcher = dispatcher
+        self._send = send
+        self._edit = edit
+
+        self._handlers = {}    # kind -> callback(entry, message)
+        self._inflight = set()
+
+    def add_handler(self, kind: str, callback: typing.Callable[[Outbox, typing.Union[discord.Message, dict]], typing.Awaitable]) -> None:
+        """
+        Register a callback to run after a notification of the specified kind has been delivered
+        Edit kinds pass the raw message payload returned by Discord instead of a Message
+        """
+        self._handlers[kind] = callback
+
+    async def post(self, event: str, kind: str, world: str, hunt_name: str, instance: int, rank: str,
+                   embed: discord.Embed, contents: typing.Dict[int, str],
+                   message_ids: typing.Optional[typing.Dict[int, int]] = None) -> None:
+        """
+        Persist a notification for every channel in contents (channel_id -> message content) and deliver them
+        Edit kinds require message_ids (channel_id -> ID of the message to edit). Posting the same event to the same
+        channel twice is a no-op
+        """
+        if not contents:
+            return
+
+        now = arrow.utcnow().timestamp
+        _embed = json.dumps(embed.to_dict())
+        message_ids = message_ids or {}
+
+        def _post():
+            Outbox.insert_many([{
+                'event'     : event,
+                'channel_id': channel,
+                'kind'      : kind,
+                'world'     : world,
+                'hunt_name' : hunt_name,
+                'instance'  : instance,
+                'rank'      : rank,
+                'content'   : content,
+                'embed'     : _embed,
+                'message_id': message_ids.get(channel),
+                'created'   : now,
+            } for channel, content in contents.items()]).on_conflict_ignore().execute()
+
+            return list(Outbox.select().where(
+                    (Outbox.event == event)
+                    & (Outbox.status == Outbox.STATUS_PENDING)
+                    & (Outbox.attempts == 0)
+            ))
+
+        await self._deliver_event(await db_executor.write(_post))
+
+    async def run(self) -> None:
+        """
+        Resume undelivered notifications and retry failed ones
+        """
+        while True:
+            # noinspection PyBroadException
+            try:
+                await self._retry()
+                await self._purge()
+            except Exception:
+                self._log.exception('Exception thrown while retrying outbox notifications')
+            await asyncio.sleep(self.RETRY_INTERVAL)
+
+    async def _retry(self) -> None:
+        now = arrow.utcnow().timestamp
+
+        # Drop notifications that are too old to be useful
+        await db_executor.write(lambda: Outbox.update({Outbox.status: Outbox.STATUS_FAILED}).where(
+                (Outbox.status == Outbox.STATUS_PENDING)
+                & (Outbox.created < now - self.MAX_AGE)
+        ).execute())
+
+        entries = await db_executor.read(lambda: list(Outbox.select().where(
+                (Outbox.status == Outbox.STATUS_PENDING)
+                & (Outbox.next_attempt <= now)
+        )))
+
+        events = {}
+        for entry in entries:  # type: Outbox
+            if entry.id in self._inflight:
+                continue
+            events.setdefault(entry.event, []).append(entry)
+
+        if events:
+            self._log.info(f"Resuming delivery of {sum(map(len, events.values()))} outbox notification(s)")
+            await asyncio.gather(*[self._deliver_event(e) for e in events.values()])
+
+    async def _purge(self) -> None:
+        await db_executor.write(lambda: Outbox.delete().where(
+                (Outbox.status != Outbox.STATUS_PENDING)
+                & (Outbox.created < arrow.utcnow().timestamp - self.PURGE_AGE)
+        ).execute())
+
+    async def _deliver_event(self, entries: typing.List[Outbox]) -> None:
+        if not entries:
+            return
+
+        channels = {e.channel_id: e for e in entries if e.id not in self._inflight}
+        inflight = {e.id for e in channels.values()}
+        self._inflight.update(inflight)
+
+        try:
+            # Entries may be stale copies read before another delivery picked them up, only send the ones claimed here
+            claimed = await db_executor.write(self._claim, list(channels.values()))
+            if len(claimed) < len(channels):
+                self._log.debug(f"Skipping {len(channels) - len(claimed)} outbox notification(s) already being delivered")
+            channels = {e.channel_id: e for e in claimed}
+
+            first = entries[0]
+            await self._dispatcher.fan_out(channels, lambda channel: self._deliver(channels[channel]),
+                                           self._dispatcher.priority(first.rank), f"{first.hunt_name} {first.kind} on {first.world}")
+        finally:
+            self._inflight.difference_update(inflight)
+
+    def _claim(self, entries: typing.List[Outbox]) -> typing.List[Outbox]:
+        """
+        Claim entries for delivery by bumping their attempt count, as long as nobody else has since
+        Runs on the database writer thread; claimed entries aren't picked up by a retry until CLAIM_TIMEOUT has passed
+        """
+        now = arrow.utcnow().timestamp
+        claimed = []
+        for entry in entries:
+            updated = Outbox.update({
+                Outbox.attempts    : Outbox.attempts + 1,
+                Outbox.next_attempt: now + self.CLAIM_TIMEOUT,
+            }).where(
+                    (Outbox.id == entry.id)
+                    & (Outbox.status == Outbox.STATUS_PENDING)
+                    & (Outbox.attempts == entry.attempts)
+            ).execute()
+
+            if updated:
+                entry.attempts += 1
+                entry.next_attempt = now + self.CLAIM_TIMEOUT
+                claimed.append(entry)
+
+        return claimed
+
+    async def _deliver(self, entry: Outbox) -> typing.Union[discord.Message, dict, None]:
+        embed = discord.Embed.from_dict(json.loads(entry.embed))
+        try:
+            if entry.kind in self.EDIT_KINDS:
+                message = await self._edit(entry.content, embed, entry.channel_id, entry.message_id)
+            else:
+                # Discord doesn't dedupe on the nonce, _claim is what keeps an entry from being sent twice
+                message = await self._send(entry.content, embed, entry.channel_id, str(entry.id))
+        except Exception:
+            if entry.attempts >= self.MAX_ATTEMPTS:
+                self._log.exception(f"Giving up on outbox notification {entry.id} after {entry.attempts} attempts")
+                entry.status = Outbox.STATUS_FAILED
+            else:
+                self._log.warning(f"Failed to deliver outbox notification {entry.id} (attempt {entry.attempts}), retrying")
+                entry.next_attempt = arrow.utcnow().timestamp + self.BACKOFF_BASE * 2 ** (entry.attempts - 1)
+            await db_executor.write(entry.save)
+            return
+
+        # The channel (or message being edited) no longer exists or we can't post in it; there's no point retrying
+        if not message:
+            entry.status = Outbox.STATUS_FAILED
+            await db_executor.write(entry.save)
+            return
+
+        entry.status = Outbox.STATUS_DELIVERED
+        if entry.kind not in self.EDIT_KINDS:
+            entry.message_id = message.id
+        entry.delivered = arrow.utcnow().timestamp
+        await db_executor.write(entry.save)
+
+        if entry.kind in self._handlers:
+            await self._handlers[entry.kind](entry, message)
+
+        return message
@@ -0,0 +1,57 @@
+import logging
+import time
+import typing
+
+
+class AdaptivePoller:
+    """
+    Decides how long to wait before polling a Horus datacenter again
+    One poller is kept per datacenter. Polls at the original fixed cadence while a spawn window on the datacenter is
+    about to open or max and while its hunts are being marked, slowly backs off while nothing is due, and backs off
+    exponentially while the upstream keeps failing.
+    """
+
+    MIN_INTERVAL = 20.0     # Seconds between polls while something is happening, never faster than the old 7s + cache
+    MAX_INTERVAL = 120.0    # Upper bound while idle
+    IDLE_BACKOFF = 1.5      # Idle interval multiplier per quiet poll
+    NEAR_WINDOW = 300       # Seconds around a window transition considered active
+    RECENT_MARK = 600       # Seconds after a hunt is marked considered active
+    ERROR_BASE = 15.0       # First retry delay after a failed poll, doubled on every consecutive failure
+    ERROR_MAX = 600.0
+
+    def __init__(self):
+        self._log = logging.getLogger(__name__)
+
+        self._idle = self.MIN_INTERVAL
+        self._errors = 0
+
+    def success(self) -> None:
+        if self._errors:
+            self._log.info(f"Horus recovered after {self._errors} failed poll(s)")
+        self._errors = 0
+
+    def failure(self) -> None:
+        self._errors += 1
+
+    def interval(self, next_transition: typing.Optional[float] = None, last_activity: float = 0.0,
+                 _time: typing.Optional[float] = None) -> float:
+        """
+        Get the delay before the next poll
+        next_transition and last_activity are unix timestamps of the datacenter's next window transition and of its
+        most recent mark, death or sighting
+        """
+        now = _time if _time is not None else time.time()
+
+        if self._errors:
+            return min(self.ERROR_BASE * 2 ** (self._errors - 1), self.ERROR_MAX)
+
+        near = next_transition is not None and next_transition - now <= self.NEAR_WINDOW
+        if near or now - last_activity <= max(self.NEAR_WINDOW, self.RECENT_MARK):
+            self._idle = self.MIN_INTERVAL
+            return self.MIN_INTERVAL
+
+        # Nothing is due, back off gradually but wake up in time for the next window
+        self._idle = min(self._idle * self.IDLE_BACKOFF, self.MAX_INTERVAL)
+        if next_transition is not None:
+            return max(min(self._idle, next_transition - self.NEAR_WINDOW - now), self.MIN_INTERVAL)
+        return self._idle
@@ -0,0 +1,107 @@
+import asyncio
+import functools
+import heapq
+import logging
+import math
+import time
+import typing
+
+
+class TimerWheel:
+    """
+    Hashed timer wheel used to fire callbacks at (or just after) a known point in time
+    Timers are bucketed into fixed-width ticks, so scheduling and cancelling are O(1). Callbacks run as their own tasks,
+    so a slow one doesn't hold back the timers that fall due while it's running.
+    """
+
+    RESOLUTION = 0.5  # Width of a single tick in seconds
+
+    def __init__(self, resolution: float = RESOLUTION):
+        self._log = logging.getLogger(__name__)
+        self._resolution = resolution
+
+        self._slots = {}    # tick -> {key: (when, callback)}
+        self._timers = {}   # key -> tick
+        self._ticks = []    # heap of ticks with at least one scheduled timer
+        self._last_tick = 0
+        self._running = set()  # Callback tasks that haven't finished yet
+
+        self._wakeup = None  # type: typing.Optional[asyncio.Event]
+
+    def schedule(self, key: typing.Hashable, when: float, callback: typing.Callable[[], typing.Awaitable]) -> None:
+        """
+        Schedule a coroutine callback to fire at the specified unix timestamp, replacing any existing timer for key
+        """
+        self.cancel(key)
+
+        tick = max(math.ceil(when / self._resolution), self._last_tick + 1)
+        if tick not in self._slots:
+            self._slots[tick] = {}
+            heapq.heappush(self._ticks, tick)
+        self._slots[tick][key] = (when, callback)
+        self._timers[key] = tick
+
+        # Wake the runner up if this timer is due before the one it's currently waiting on
+        if self._wakeup is not None and self._ticks[0] == tick:
+            self._wakeup.set()
+
+    def cancel(self, key: typing.Hashable) -> None:
+        """
+        Cancel a scheduled timer (empty slots are discarded lazily)
+        """
+        tick = self._timers.pop(key, None)
+        if tick is not None and tick in self._slots:
+            del self._slots[tick][key]
+
+    def __len__(self):
+        return len(self._timers)
+
+    def __contains__(self, key: typing.Hashable):
+        return key in self._timers
+
+    async def run(self) -> None:
+        """
+        Fire timers as they become due
+        """
+        self._wakeup = asyncio.Event()
+
+        while True:
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self._next_delay())
+            except asyncio.TimeoutError:
+                pass
+
+            self._fire_due()
+
+    def _next_delay(self) -> typing.Optional[float]:
+        # Discard empty slots left behind by cancelled timers
+        while self._ticks and not self._slots.get(self._ticks[0]):
+            self._slots.pop(heapq.heappop(self._ticks), None)
+
+        if not self._ticks:
+            return None
+
+        return max(self._ticks[0] * self._resolution - time.time(), 0)
+
+    def _fire_due(self) -> None:
+        now_tick = math.floor(time.time() / self._resolution)
+
+        while self._ticks and self._ticks[0] <= now_tick:
+            tick = heapq.heappop(self._ticks)
+            self._last_tick = max(self._last_tick, tick)
+
+            for key, (when, callback) in self._slots.pop(tick, {}).items():
+                # Skip timers cancelled or rescheduled by an earlier callback
+                if self._timers.get(key) != tick:
+                    continue
+                del self._timers[key]
+
+                task = asyncio.ensure_future(callback())
+                task.add_done_callback(functools.partial(self._fired, key))
+                self._running.add(task)
+
+    def _fired(self, key: typing.Hashable, task: asyncio.Future) -> None:
+        self._running.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            self._log.error(f"Exception thrown while firing timer {key}", exc_info=task.exception())
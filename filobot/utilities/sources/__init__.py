@@ -0,0 +1,4 @@
+from .base import HuntEvent, Source
+from .pipeline import EventPipeline
+from .tracker import TrackerSource
+from .xivhunt import XivHuntSource
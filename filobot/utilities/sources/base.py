@@ -0,0 +1,80 @@
+import typing
+
+
+class HuntEvent:
+    """
+    Normalized hunt report, independent of the tracker it came from
+    """
+
+    __slots__ = ('world_id', 'hunt_id', 'instance', 'status', 'x', 'y', 'reported_at', 'source', 'trust')
+
+    STATUS_FOUND = 'FOUND'
+    STATUS_DEAD = 'DEAD'
+    STATUS_MAYBE_DEAD = 'MAYBE_DEAD'  # Deaths reported by untrusted sources
+
+    def __init__(self, world_id: int, hunt_id: int, instance: int, status: str, reported_at: float, source: str,
+                 x: typing.Optional[float] = None, y: typing.Optional[float] = None):
+        self.world_id = int(world_id)
+        self.hunt_id = int(hunt_id)
+        self.instance = int(instance) or 1
+        self.status = status
+        self.x = x
+        self.y = y
+        self.reported_at = reported_at  # Unix timestamp in seconds
+        self.source = source
+        self.trust = 1.0  # Set by the pipeline from the source
+
+    @property
+    def coords(self) -> typing.Optional[str]:
+        if self.x is None or self.y is None:
+            return None
+        return f"{self.x}, {self.y}"
+
+    def __repr__(self):
+        return f"<HuntEvent {self.status} hunt {self.hunt_id} on world {self.world_id} i{self.instance} via {self.source}>"
+
+
+class Source:
+    """
+    Base tracker source adapter
+    Push sources (e.g. webhooks) submit events as they arrive, while polling sources implement poll() and are polled
+    every INTERVAL seconds by the pipeline. Each source has its own queue and rate limit, so a slow or noisy source
+    can't hold up the others.
+    """
+
+    NAME = 'source'
+    PRIORITY = 1        # Lower is handled first when several sources have events waiting
+    TRUST = 1.0         # Deaths reported by sources below EventPipeline.TRUSTED are only treated as possible deaths
+    RATE = 50.0         # Events per second
+    BURST = 100
+    INTERVAL = None     # type: typing.Optional[float]
+
+    def __init__(self):
+        self._pipeline = None  # type: typing.Optional['EventPipeline']
+
+    @property
+    def polling(self) -> bool:
+        return self.INTERVAL is not None
+
+    def submit(self, event: HuntEvent) -> bool:
+        """
+        Submit an event to the pipeline, returning False if it was dropped
+        """
+        if self._pipeline is None:
+            raise RuntimeError(f"Source {self.NAME} has not been registered with a pipeline")
+        return self._pipeline.submit(self, event)
+
+    async def put(self, event: HuntEvent) -> None:
+        """
+        Submit an event to the pipeline, waiting for room in the source's queue instead of dropping it
+        """
+        if self._pipeline is None:
+            raise RuntimeError(f"Source {self.NAME} has not been registered with a pipeline")
+        await self._pipeline.put(self, event)
+
+    async def poll(self) -> typing.List[HuntEvent]:
+        """
+        Fetch new events (polling sources only)
+        """
+        return []
+
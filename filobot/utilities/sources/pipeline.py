@@ -0,0 +1,153 @@
+import asyncio
+import itertools
+import logging
+import typing
+
+from filobot.utilities.dispatcher import RateLimiter
+from .base import HuntEvent, Source
+
+
+class EventPipeline:
+    """
+    Merges events from every registered source into a single handler
+    Every source gets its own bounded queue and rate limiter, drained by its own feeder into a shared priority queue,
+    so a slow or flooding source only ever delays its own events. A pool of workers then hands events to the handler.
+    Push sources wait for room in their queue (put), so backpressure reaches whoever is feeding them, while polling
+    sources drop events when their queue is full (submit).
+    """
+
+    QUEUE_SIZE = 500    # Events waiting per source, and in the shared queue
+    WORKERS = 4
+    TRUSTED = 0.75      # Minimum trust level for a reported death to be taken at face value
+
+    def __init__(self, handler: typing.Callable[[HuntEvent], typing.Awaitable], workers: int = WORKERS):
+        self._log = logging.getLogger(__name__)
+        self._handler = handler
+        self._workers = workers
+
+        self._sources = {}  # name -> Source
+        self._queues = {}   # name -> asyncio.Queue
+        self._merged = None  # type: typing.Optional[asyncio.PriorityQueue]
+        self._sequence = itertools.count()
+        self._tasks = []
+
+        # Metrics, per source name
+        self.received = {}
+        self.dropped = {}
+        self.handled = {}
+        self.failed = {}
+
+    def register(self, source: Source) -> Source:
+        """
+        Register a source, starting it right away if the pipeline is already running
+        """
+        if source.NAME in self._sources:
+            raise ValueError(f"A source named {source.NAME} has already been registered")
+
+        source._pipeline = self
+        self._sources[source.NAME] = source
+        for counter in (self.received, self.dropped, self.handled, self.failed):
+            counter[source.NAME] = 0
+
+        if self.running:
+            self._start_source(source)
+
+        return source
+
+    @property
+    def sources(self) -> typing.List[Source]:
+        return list(self._sources.values())
+
+    @property
+    def running(self) -> bool:
+        return any(not task.done() for task in self._tasks)
+
+    def start(self) -> None:
+        if self.running:
+            return
+
+        self._merged = asyncio.PriorityQueue(self.QUEUE_SIZE)
+        self._tasks = [asyncio.ensure_future(self._worker()) for _ in range(self._workers)]
+        for source in self._sources.values():
+            self._start_source(source)
+
+    def submit(self, source: Source, event: HuntEvent) -> bool:
+        """
+        Queue an event from the specified source, returning False if the source's queue is full
+        """
+        self._accept(source, event)
+        try:
+            self._queues[source.NAME].put_nowait(event)
+        except asyncio.QueueFull:
+            self.dropped[source.NAME] += 1
+            self._log.warning(f"Event queue for source {source.NAME} is full, dropping {event!r}")
+            return False
+
+        return True
+
+    async def put(self, source: Source, event: HuntEvent) -> None:
+        """
+        Queue an event from the specified source, waiting for room if the source's queue is full
+        """
+        self._accept(source, event)
+        await self._queues[source.NAME].put(event)
+
+    def _accept(self, source: Source, event: HuntEvent) -> None:
+        self.start()
+
+        self.received[source.NAME] += 1
+        event.source = source.NAME
+        event.trust = source.TRUST
+        if event.status == HuntEvent.STATUS_DEAD and source.TRUST < self.TRUSTED:
+            event.status = HuntEvent.STATUS_MAYBE_DEAD
+
+    def metrics(self) -> dict:
+        return {
+            name: {
+                'depth'   : self._queues[name].qsize() if name in self._queues else 0,
+                'received': self.received[name],
+                'dropped' : self.dropped[name],
+                'handled' : self.handled[name],
+                'failed'  : self.failed[name],
+            } for name in self._sources
+        }
+
+    def _start_source(self, source: Source) -> None:
+        self._queues[source.NAME] = asyncio.Queue(self.QUEUE_SIZE)
+        self._tasks.append(asyncio.ensure_future(self._feed(source)))
+        if source.polling:
+            self._tasks.append(asyncio.ensure_future(self._poll(source)))
+
+    async def _feed(self, source: Source) -> None:
+        queue = self._queues[source.NAME]
+        limiter = RateLimiter(source.RATE, source.BURST)
+        while True:
+            event = await queue.get()
+            await limiter.acquire()
+            # Blocks while the workers are behind, which in turn fills the source's own queue
+            await self._merged.put((source.PRIORITY, next(self._sequence), event))
+            queue.task_done()
+
+    async def _poll(self, source: Source) -> None:
+        while True:
+            # noinspection PyBroadException
+            try:
+                for event in await source.poll():
+                    self.submit(source, event)
+            except Exception:
+                self._log.exception(f"Exception thrown while polling source {source.NAME}")
+            await asyncio.sleep(source.INTERVAL)
+
+    async def _worker(self) -> None:
+        while True:
+            priority, sequence, event = await self._merged.get()
+
+            # noinspection PyBroadException
+            try:
+                await self._handler(event)
+                self.handled[event.source] += 1
+            except Exception:
+                self.failed[event.source] += 1
+                self._log.exception(f"Exception thrown while handling {event!r}")
+            finally:
+                self._merged.task_done()
@@ -0,0 +1,46 @@
+import time
+
+from filobot.utilities.marks import marks, HW_ZONES
+from .base import HuntEvent, Source
+
+
+class TrackerSource(Source):
+    """
+    Hunt reports pushed by the in-game tracker, through the webhook server or the Discord relay channel
+    """
+
+    NAME = 'tracker'
+    PRIORITY = 0
+    TRUST = 1.0
+    RATE = 100.0
+    BURST = 500
+
+    def normalize(self, data: dict) -> HuntEvent:
+        """
+        Convert a raw tracker report into a HuntEvent
+        Raises ValueError for malformed reports and LookupError for unknown hunts
+        """
+        try:
+            hunt_id = int(data['id'])
+            world_id = int(data['wId'])
+            instance = int(data['i'])
+            raw_x, raw_y = float(data['x']), float(data['y'])
+            alive = str(data['lastAlive']) == 'True'  # Form posts send a string, JSON batches may send a boolean
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Malformed tracker report ({e!r})")
+
+        hunt = marks.by_id(hunt_id)
+
+        # Convert raw map positions into in-game coordinates
+        _plus = 22.5 if hunt.zone in HW_ZONES else 21.5
+        x, y = round((raw_x * 0.02 + _plus)*10)/10, round((raw_y * 0.02 + _plus)*10)/10
+
+        try:
+            reported_at = float(data['lastReported'])
+            if reported_at > 1e11:  # Milliseconds
+                reported_at /= 1000
+        except (KeyError, TypeError, ValueError):
+            reported_at = time.time()
+
+        return HuntEvent(world_id, hunt.id, instance, HuntEvent.STATUS_FOUND if alive else HuntEvent.STATUS_DEAD,
+                         reported_at, self.NAME, x, y)
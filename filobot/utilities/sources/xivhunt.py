@@ -0,0 +1,68 @@
+import re
+import time
+import typing
+
+from filobot.utilities.marks import marks
+from filobot.utilities.worlds import Worlds
+from filobot.utilities.xivhunt import XivHunt
+from .base import HuntEvent, Source
+
+
+class XivHuntSource(Source):
+    """
+    Polls the XIVHunt website for sightings and deaths on a set of worlds
+    XIVHunt doesn't report instances or exact report times, so it's trusted less than the in-game tracker
+    """
+
+    NAME = 'xivhunt'
+    PRIORITY = 2
+    TRUST = 0.5
+    RATE = 10.0
+    BURST = 50
+    INTERVAL = 60.0
+
+    _RE_COORDS = re.compile(r"(\d+(?:\.\d+)?)\D+(\d+(?:\.\d+)?)")
+
+    def __init__(self, xivhunt: XivHunt, worlds: typing.Iterable[str]):
+        super().__init__()
+        self._xivhunt = xivhunt
+        self._worlds = [world.strip() for world in worlds]
+
+        # (world, hunt name) -> last seen status, so only changes are submitted
+        self._last = {}
+
+    async def poll(self) -> typing.List[HuntEvent]:
+        events = []
+        for world in self._worlds:
+            hunts = await self._xivhunt.load(world)
+            for name, data in hunts.items():
+                event = self._to_event(world, name, data)
+                if event is None:
+                    continue
+
+                key = (world, name)
+                if self._last.get(key) == (event.status, event.coords):
+                    continue
+                self._last[key] = (event.status, event.coords)
+                events.append(event)
+
+        return events
+
+    def _to_event(self, world: str, name: str, data: dict) -> typing.Optional[HuntEvent]:
+        if data['status'] == 'seen':
+            status = HuntEvent.STATUS_FOUND
+        elif data['status'] == 'dead':
+            status = HuntEvent.STATUS_DEAD
+        else:
+            return None
+
+        mark = marks.find(name)
+        if mark is None:
+            return None
+
+        x = y = None
+        match = self._RE_COORDS.search(data['coords'] or '')
+        if match:
+            x, y = float(match.group(1)), float(match.group(2))
+
+        return HuntEvent(Worlds.get_world_id(world), mark.id, 1, status, time.time(), self.NAME, x, y)
@@ -0,0 +1,122 @@
+import typing
+
+from filobot.utilities.worlds import Worlds
+
+
+class SubscriptionIndex:
+    """
+    In-memory routing index for hunt subscriptions
+    Maps (world, category) to the subscribed channels and the bitmask of conditions each is subscribed to, alongside each
+    channel's meta (notifier role, etc.). Datacenter-wide subscriptions are a single entry keyed by the datacenter name.
+    """
+
+    def __init__(self):
+        self._routes = {}       # (world or datacenter, category) -> {channel_id: conditions}, insertion ordered
+        self._channels = {}     # channel_id -> set of routes the channel is subscribed to
+        self._meta = {}         # channel_id -> {name: value}
+        self._datacenters = {}  # world -> datacenter, cached
+
+    def rebuild(self, subscriptions: typing.Iterable, meta: typing.Iterable) -> None:
+        """
+        Rebuild the index from Subscriptions and SubscriptionsMeta rows
+        """
+        self._routes = {}
+        self._channels = {}
+        self._meta = {}
+
+        for sub in subscriptions:
+            self.set(sub.channel_id, sub.world, sub.category, sub.conditions)
+
+        for m in meta:
+            self.set_meta(m.channel_id, m.name, m.value)
+
+    def set(self, channel_id: int, world: str, category: str, conditions: int) -> None:
+        """
+        Set the conditions a channel is subscribed to for a category on a world (or datacenter)
+        """
+        route = (world, category)
+        if not conditions:
+            self._discard(channel_id, route)
+            return
+
+        if route not in self._routes:
+            self._routes[route] = {}
+        self._routes[route][channel_id] = conditions
+
+        if channel_id not in self._channels:
+            self._channels[channel_id] = set()
+        self._channels[channel_id].add(route)
+
+    def remove(self, channel_id: int, world: str, category: str) -> None:
+        """
+        Remove a channels subscription to a category on the specified world (or datacenter)
+        """
+        self._discard(channel_id, (world, category))
+
+    def replace(self, channel_id: int, worlds: typing.Iterable[str], categories: typing.Iterable[str],
+                routes: typing.Iterable[typing.Tuple[str, str, int]]) -> None:
+        """
+        Replace a channels subscriptions to the given categories on the given worlds with routes, in a single pass
+        """
+        worlds, categories = set(worlds), set(categories)
+        for route in [r for r in self._channels.get(channel_id, ()) if r[0] in worlds and r[1] in categories]:
+            self._discard(channel_id, route)
+
+        for world, category, conditions in routes:
+            self.set(channel_id, world, category, conditions)
+
+    def remove_channel(self, channel_id: int) -> None:
+        """
+        Remove all subscriptions for the specified channel
+        """
+        for route in list(self._channels.get(channel_id, ())):
+            self._discard(channel_id, route)
+
+    def is_subscribed(self, channel_id: int, world: str, category: str) -> bool:
+        routes = self._channels.get(channel_id, ())
+        return (world, category) in routes or (self._datacenter(world), category) in routes
+
+    def get(self, world: str, category: str, condition: int) -> typing.List[int]:
+        """
+        Get all channels subscribed to the specified condition, on the world itself or its whole datacenter
+        """
+        channels = {}
+        for route in ((world, category), (self._datacenter(world), category)):
+            for channel_id, conditions in self._routes.get(route, {}).items():
+                if conditions & condition:
+                    channels[channel_id] = None
+
+        return list(channels)
+
+    def meta(self, channel_id: int) -> dict:
+        return self._meta.get(channel_id, {})
+
+    def set_meta(self, channel_id: int, name: str, value) -> None:
+        if channel_id not in self._meta:
+            self._meta[channel_id] = {}
+        self._meta[channel_id][name] = value
+
+    def remove_meta(self, channel_id: int, name: str) -> None:
+        self._meta.get(channel_id, {}).pop(name, None)
+
+    def _datacenter(self, world: str) -> typing.Optional[str]:
+        if world not in self._datacenters:
+            try:
+                self._datacenters[world] = Worlds.get_world_datacenter(world)
+            except KeyError:
+                # World data isn't loaded yet, try again next time
+                return None
+        return self._datacenters[world]
+
+    def _discard(self, channel_id: int, route: tuple) -> None:
+        channels = self._routes.get(route)
+        if channels is not None:
+            channels.pop(channel_id, None)
+            if not channels:
+                del self._routes[route]
+
+        routes = self._channels.get(channel_id)
+        if routes is not None:
+            routes.discard(route)
+            if not routes:
+                del self._channels[channel_id]
@@ -1,6 +1,8 @@
 import asyncio
-from filobot.filobot import config, bot
-from filobot.tasks import update_game, update_hunts, update_worlds, start_server, discord_listener, track_stats
+from filobot.filobot import config, bot, hunt_manager
+from filobot.tasks import update_game, update_hunts, update_transitions, update_worlds, start_server, discord_listener, \
+    track_stats, deliver_notifications, purge_notifications, flush_counters, process_events
+from filobot.utilities.sources import XivHuntSource
 import filobot.utilities.worlds as worlds
 
 # Initialize datacenters and worlds data
@@ -8,12 +10,22 @@ asyncio.run(worlds.init())
 
 # Add bot tasks
 bot.loop.create_task(update_hunts())
+bot.loop.create_task(update_transitions())
+bot.loop.create_task(process_events())
+bot.loop.create_task(deliver_notifications())
+bot.loop.create_task(purge_notifications())
+bot.loop.create_task(flush_counters())
 bot.loop.create_task(update_game())
 bot.loop.create_task(track_stats())
 bot.loop.create_task(update_worlds())
 
 if config.get('WebhookServer', 'Enabled') == 'TRUE':
-    bot.loop.create_task(start_server(config.get('WebhookServer', 'Address'), config.get('WebhookServer', 'Port')))
+    bot.loop.create_task(start_server(config.get('WebhookServer', 'Address'), config.get('WebhookServer', 'Port'),
+                                      config.getint('WebhookServer', 'QueueSize', fallback=1000),
+                                      config.getint('WebhookServer', 'Workers', fallback=4)))
+
+if config.get('XivHunt', 'Enabled', fallback='FALSE') == 'TRUE':
+    hunt_manager.pipeline.register(XivHuntSource(hunt_manager.xivhunt, config.get('XivHunt', 'Worlds').split(',')))
 
 if config.get('WebhookDiscord', 'Enabled') == 'TRUE':
     bot.loop.create_task(discord_listener(config.get('WebhookDiscord', 'Channel')))